@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import uuid
+import logging
+
+# Get a specific logger for this module
+logger = logging.getLogger(__name__)
+
+# Redis is optional: without it every cache stays process-local
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+# Delete KEYS[1] only while it still holds our token (ARGV[1]), atomically on the server
+_RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+class SharedCache:
+    """
+    Key-value cache shared by every worker pointed at the same Redis: JSON values with a TTL,
+    plus a SET NX lock so only one worker fetches a missing key from upstream.
+    Redis errors are logged and treated as a miss (or a granted lock), so callers always
+    fall back to fetching upstream themselves.
+    """
+    def __init__(self, client, prefix="ffe:"):
+        self.client = client
+        self.prefix = prefix
+        self._tokens = {}
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.debug(f"Shared cache GET {key} failed: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            logger.debug(f"Shared cache SET {key} failed: {e}")
+
+    def acquire(self, key, ttl):
+        """
+        Try to become the single worker fetching `key`; the lock expires after `ttl` seconds.
+        Returns True without a lock when Redis errors, so the caller fetches upstream itself.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(f"{self.prefix}lock:{key}", token, nx=True, px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            logger.debug(f"Shared cache lock on {key} failed, fetching without it: {e}")
+            return True
+        if acquired:
+            self._tokens[key] = token
+        return bool(acquired)
+
+    def release(self, key):
+        token = self._tokens.pop(key, None)
+        if token is None:
+            return
+        try:
+            # Only drop our own lock; it may have expired and been taken by another worker, so the
+            # token check and the delete run as one script instead of a racy GET then DELETE
+            self.client.eval(_RELEASE_LOCK_SCRIPT, 1, f"{self.prefix}lock:{key}", token)
+        except Exception as e:
+            logger.debug(f"Shared cache unlock on {key} failed: {e}")
+
+    def wait_for(self, key, timeout, accept=None, poll_interval=0.05):
+        """Poll until another worker stores `key` (and `accept(value)` holds) or `timeout` passes."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            value = self.get(key)
+            if value is not None and (accept is None or accept(value)):
+                return value
+            time.sleep(poll_interval)
+        return None
+
+def get_shared_cache(url=None):
+    """Return a SharedCache for `url` (default: REDIS_URL), or None when unset or redis is not installed."""
+    url = url or os.getenv("REDIS_URL")
+    if not url:
+        return None
+    if not REDIS_AVAILABLE:
+        logger.warning("REDIS_URL is set but the redis package is not installed; caches stay process-local. Run 'pip install redis'")
+        return None
+    try:
+        client = redis.Redis.from_url(url)
+    except Exception as e:
+        logger.error(f"Invalid REDIS_URL, caches stay process-local: {e}")
+        return None
+    logger.info("Using Redis for the shared quote and decision caches")
+    return SharedCache(client)
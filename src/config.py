@@ -51,6 +51,14 @@ class Config:
     pair_blacklist_duration_seconds = int(os.getenv("PAIR_BLACKLIST_DURATION_SECONDS", 3600)) # Duration to blacklist a pair after inactivity
     max_consecutive_system_switches = int(os.getenv("MAX_CONSECUTIVE_SYSTEM_SWITCHES", 3)) # Max consecutive pair switches before system cooldown
     system_cool_down_duration_seconds = int(os.getenv("SYSTEM_COOL_DOWN_DURATION_SECONDS", 1800)) # System cooldown duration
+    quote_cache_ttl_seconds = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", 0.5)) # Reuse a broker quote for this long
+    history_window = int(os.getenv("HISTORY_WINDOW", 50)) # Recent trades kept in memory and sent to the LLM
+    max_idle_seconds = float(os.getenv("MAX_IDLE_SECONDS", 60.0)) # Longest wait between decisions when nothing happens
+    price_change_threshold_pct = float(os.getenv("PRICE_CHANGE_THRESHOLD_PCT", 0.01)) # Price move (percent) that wakes the loop early
+    price_poll_interval_seconds = float(os.getenv("PRICE_POLL_INTERVAL_SECONDS", 15.0)) # Quote polling period while idle
+    redis_url = os.getenv("REDIS_URL") # Optional: share quote and LLM response caches across workers
+    orjson_requests = os.getenv("ORJSON_REQUESTS", "False").lower() == "true" # Encode OpenAI request bodies with orjson (patches the SDK process-wide)
+    decision_cache_ttl_seconds = float(os.getenv("DECISION_CACHE_TTL_SECONDS", 2 * max_idle_seconds)) # Reuse an LLM decision on unchanged inputs; outlives an idle wait so it can hit; 0 disables
 
     def __init__(self):
         logging.getLogger(__name__).debug(f"Config initialized with POLYGON_API_KEY={self.polygon_api_key}")
\ No newline at end of file
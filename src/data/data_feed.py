@@ -152,4 +152,32 @@ class DataFeed:
             raise ConnectionError(f"Failed to fetch data from Polygon for {pair} due to: {e}")
 
     # Alias for get_quote to be consistent with main
-    get_quote = fetch_data
\ No newline at end of file
+    get_quote = fetch_data
+
+    def wait_for_price_change(self, symbol, reference_price, min_change_pct, timeout, poll_interval=15.0):
+        """
+        Poll the quote for `symbol` until it moves at least `min_change_pct` percent away from
+        `reference_price`, or `timeout` seconds pass.
+        
+        Returns:
+            The latest quote fetched, or None if no quote could be fetched before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        quote = None
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return quote
+            time.sleep(min(poll_interval, remaining))
+            try:
+                latest = self.get_quote(symbol)
+            except (ConnectionError, LookupError, ValueError) as e:
+                logger.debug(f"Price poll for {symbol} failed, will retry: {e}")
+                continue
+            quote = latest
+            price = latest.get('price')
+            if not reference_price or not isinstance(price, (int, float)):
+                return quote
+            if abs(price - reference_price) / reference_price * 100 >= min_change_pct:
+                logger.debug(f"{symbol} moved from {reference_price} to {price}; waking trading loop")
+                return quote
\ No newline at end of file
@@ -16,6 +16,10 @@ except ImportError:
     TA_AVAILABLE = False
     logger.warning("pandas_ta not installed; advanced indicators and pattern detection disabled.") # Uses module logger
 
+# Indicator keys whose values are labels rather than floats; every other key
+# emitted by calculate_technical_indicators is a float
+NON_NUMERIC_INDICATORS = frozenset({'trend_direction'})
+
 class HistoricalDataCollector:
     """
     Manages historical price data collection and processing for temporal context.
@@ -39,9 +43,16 @@ class HistoricalDataCollector:
         # Update frequency in seconds (default: 5 min)
         self.update_frequency = self.timeframe_minutes * 60
         
+        # Callbacks invoked with the symbol whenever fresh candles replace the cached data
+        self._candle_listeners = []
+        
         logger.info(f"HistoricalDataCollector initialized with lookback_periods={lookback_periods}, "
                    f"timeframe_minutes={timeframe_minutes}")
     
+    def add_candle_listener(self, callback) -> None:
+        """Register `callback(symbol)` to be called whenever new data is stored for a symbol."""
+        self._candle_listeners.append(callback)
+    
     def _fetch_historical_data_from_polygon(self, symbol: str) -> Optional[pd.DataFrame]:
         """Fetch historical price data from Polygon API, trying multiple past windows if necessary."""
         if not self.data_feed or not self.data_feed.client:
@@ -248,6 +259,12 @@ class HistoricalDataCollector:
             self.last_update_time[symbol] = current_time
             
             logger.debug(f"Updated historical data for {symbol} ({len(df)} rows)")
+            
+            for callback in self._candle_listeners:
+                try:
+                    callback(symbol)
+                except Exception as e:
+                    logger.warning(f"Candle listener failed for {symbol}: {e}")
         
         return self.historical_data.get(symbol, pd.DataFrame())
     
@@ -259,7 +276,8 @@ class HistoricalDataCollector:
             symbol: The currency pair symbol
             
         Returns:
-            Dictionary containing calculated technical indicators
+            Dictionary containing calculated technical indicators; values are floats
+            except for the keys in NON_NUMERIC_INDICATORS
         """
         df = self.get_historical_data(symbol)
         results: Dict[str, Any] = {}
@@ -0,0 +1,297 @@
+import re
+import time
+import uuid
+import logging
+import traceback # Added for detailed exception logging
+import concurrent.futures
+
+# Get a specific logger for this module
+logger = logging.getLogger(__name__)
+
+# Try to import the OpenAI library and determine its version
+try:
+    import openai
+    try:
+        # Check if we're using OpenAI v1.x (newer)
+        from openai import OpenAI
+        OPENAI_V1 = True
+        logger.info("Using OpenAI v1.x API")
+        try:
+            from openai import RateLimitError
+        except ImportError:
+            class RateLimitError(Exception): # type: ignore
+                pass
+    except ImportError:
+        # We're using OpenAI v0.x (older)
+        OPENAI_V1 = False
+        logger.info("Using OpenAI v0.x API")
+        try:
+            from openai.error import RateLimitError # type: ignore
+        except ImportError:
+            class RateLimitError(Exception): # type: ignore
+                pass
+except ImportError:
+    logger.error("OpenAI library not installed. Run 'pip install openai'")
+    raise ImportError("OpenAI library not installed. Run 'pip install openai'")
+
+from .circuit_breaker import CircuitBreaker
+
+# Shared across all engine instances so an API outage trips the breaker process-wide
+_breaker = CircuitBreaker(fail_threshold=5, reset_timeout=30)
+
+# Decode budgets matched to the expected output grammar:
+# a decision is "CALL" / "PUT" / "NO TRADE", a pair selection is a single symbol
+DECISION_MAX_TOKENS = 8
+SELECT_PAIR_MAX_TOKENS = 12
+# Appended to the decision system prompt so the capped budget is spent on the answer, not on reasoning
+DECISION_OUTPUT_INSTRUCTION = " Respond with only one of: CALL, PUT, or NO TRADE."
+
+# Whole words only: "PUT" must not match inside "INPUT", nor "CALL" inside "RECALL"
+_NO_TRADE_RE = re.compile(r'\bNO\s+TRADE\b', re.IGNORECASE)
+_DIRECTION_RE = re.compile(r'\b(CALL|PUT)\b', re.IGNORECASE)
+_DECISION_RE = re.compile(r'\b(?:NO\s+TRADE|CALL|PUT)\b', re.IGNORECASE)
+
+def _contains_decision(text):
+    """
+    True once a streamed decision response holds a complete line naming a decision. A partial
+    line is not enough: the next chunk could still extend the word or turn the answer around.
+    """
+    complete, _, _ = text.rpartition("\n")
+    return _DECISION_RE.search(complete) is not None
+
+def _symbol_pattern(symbols):
+    """Regex matching any of `symbols` as a whole token, longest first so EURUSDT wins over EURUSD."""
+    alternatives = "|".join(re.escape(s.upper()) for s in sorted(symbols, key=len, reverse=True))
+    return re.compile(rf'(?<![A-Z0-9])(?:{alternatives})(?![A-Z0-9])')
+
+def _contains_symbol(symbol_re, text):
+    """
+    True once a streamed pair selection names a symbol that something else follows; a symbol at
+    the very end of the text may still be the prefix of a longer one (EURUSD of EURUSDT).
+    """
+    return any(m.end() < len(text) for m in symbol_re.finditer(text.upper()))
+
+class BaseLLMEngine:
+    """
+    Shared OpenAI plumbing for the LLMEngine variants: client setup, the decision
+    retry loop, response parsing and the symbol-extraction loop used by select_pair.
+    Subclasses only decide how the select_pair prompt is built.
+    """
+    def __init__(self, api_key, prompt_config=None, model="gpt-4"):
+        self.api_key = api_key
+        self.model = model
+
+        # Corrected f-string and use module-specific logger
+        logger.info(f"API key provided: {'Yes' if self.api_key else 'No'}")
+
+        if OPENAI_V1:
+            self.client = OpenAI(api_key=self.api_key)
+            logger.info(f"OpenAI version: {openai.__version__}")
+        else:
+            openai.api_key = self.api_key # type: ignore
+            logger.info(f"OpenAI version: {openai.__version__}") # type: ignore
+
+        from .prompt_config import PromptConfig
+        self.prompt_config = prompt_config or PromptConfig()
+
+        # Background workers used to compute the next decision while a trade is still open
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+    def prefetch_decision(self, market_data, recent_trades) -> concurrent.futures.Future:
+        """
+        Start computing a decision in the background and return its Future.
+        Call at trade-open time; at settlement `future.result(timeout=1.0)` yields the decision.
+        """
+        return self._executor.submit(self.get_decision, market_data, recent_trades)
+
+    def _call_llm(self, system_msg, user_content, max_tokens, timeout, is_complete=None, idempotency_key=None):
+        """
+        Stream a chat completion through whichever OpenAI interface is installed and return its text.
+        If `is_complete(text)` returns True the stream is closed early, so decoding stops
+        as soon as enough of the answer has arrived to act on.
+        `idempotency_key` is sent as the Idempotency-Key header; reuse it across retries of one request.
+        """
+        messages = [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_content}
+        ]
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        if OPENAI_V1:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0,
+                timeout=timeout,
+                stream=True,
+                extra_headers=headers
+            )
+        else:
+            # Fallback to legacy interface for compatibility
+            stream = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0,
+                request_timeout=timeout,
+                stream=True,
+                headers=headers
+            )
+
+        content = ""
+        try:
+            for chunk in stream:
+                if OPENAI_V1:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                else:
+                    delta = chunk["choices"][0]["delta"].get("content") if chunk["choices"] else None
+                if not delta:
+                    continue
+                content += delta
+                if is_complete and is_complete(content):
+                    logger.debug("Answer complete, closing completion stream early")
+                    break
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+        return content
+
+    def get_decision(self, market_data, recent_trades):
+        logger.debug(f"LLMEngine.get_decision called with market_data: {market_data}")
+        logger.debug(f"LLMEngine.get_decision called with recent_trades: {recent_trades}")
+
+        system_msg = self.prompt_config.get_system_prompt() + DECISION_OUTPUT_INSTRUCTION
+        user_content = (
+            f"Market Data: {market_data}\\nRecent Trades: {recent_trades}"
+        )
+        if _breaker.is_open():
+            logger.warning("Circuit breaker open: skipping OpenAI API call, defaulting to NO TRADE.")
+            return "NO TRADE"
+
+        max_retries = 3
+        backoff = 1
+        content = None
+        api_timeout_seconds = 30 # Define a timeout for the API call
+        # One key for every attempt so a retry after a lost response is not billed twice
+        request_id = uuid.uuid4().hex
+
+        for attempt in range(max_retries):
+            try:
+                logger.debug(f"Attempting OpenAI API call with model: {self.model}, timeout: {api_timeout_seconds}s")
+                content = self._call_llm(system_msg, user_content, DECISION_MAX_TOKENS, api_timeout_seconds,
+                                         is_complete=_contains_decision, idempotency_key=request_id)
+
+                if not content:
+                    logger.error("OpenAI API returned no completion content.")
+                    _breaker.record_failure()
+                    return "NO TRADE"
+                break
+            except RateLimitError:
+                logger.warning(f"OpenAI rate limit hit on attempt {attempt + 1}/{max_retries}, retrying in {backoff} seconds...")
+                if attempt < max_retries - 1:
+                    time.sleep(backoff)
+                    backoff *= 2
+                else:
+                    logger.error("OpenAI rate limit exceeded after all retries, defaulting to NO TRADE.")
+                    _breaker.record_failure()
+                    return "NO TRADE"
+            except openai.APITimeoutError as e: # Specific handling for timeouts
+                logger.error(f"OpenAI API call timed out after {api_timeout_seconds} seconds on attempt {attempt + 1}/{max_retries}: {e}")
+                logger.error(traceback.format_exc()) # Log full traceback
+                if attempt < max_retries - 1:
+                    logger.info(f"Retrying in {backoff} seconds...")
+                    time.sleep(backoff)
+                    backoff *= 2
+                else:
+                    logger.error("OpenAI API call failed due to timeout after all retries, defaulting to NO TRADE.")
+                    _breaker.record_failure()
+                    return "NO TRADE"
+            except Exception as e:
+                logger.error(f"Error calling OpenAI API on attempt {attempt + 1}/{max_retries}: {e}")
+                logger.error(traceback.format_exc()) # Log full traceback
+                if attempt < max_retries - 1:
+                    logger.info(f"Retrying in {backoff} seconds...")
+                    time.sleep(backoff)
+                    backoff *= 2
+                else:
+                    logger.error("Failed to call OpenAI API after all retries, defaulting to NO TRADE.")
+                    _breaker.record_failure()
+                    return "NO TRADE"
+
+        if not content:
+             logger.error("Failed to get a valid response from OpenAI API after retries (final check). Defaulting to NO TRADE.")
+             _breaker.record_failure()
+             return "NO TRADE"
+
+        _breaker.record_success()
+        logger.debug(f"LLM decision raw content: '{content}'") # Log content before parsing
+        return self._parse_response(content)
+
+    def _parse_response(self, response_content):
+        # Check for NO TRADE first to handle cases where 'NO TRADE' appears
+        if _NO_TRADE_RE.search(response_content):
+            return "NO TRADE"
+        # Check for CALL or PUT anywhere in the response
+        match = _DIRECTION_RE.search(response_content)
+        if match:
+            return match.group(1).upper()
+        # Fallback for unexpected responses
+        logger.warning(f"LLM response '{response_content}' did not contain CALL, PUT, or NO TRADE after cleaning. Defaulting to NO TRADE.")
+        return "NO TRADE"
+
+    def _select_symbol(self, symbols, system_msg, user_content):
+        """Ask the LLM to pick one of `symbols`, falling back to the first symbol on failure."""
+        max_retries = 3
+        backoff = 1
+        api_timeout_seconds = 30 # Define a timeout for the API call
+        request_id = uuid.uuid4().hex
+
+        for attempt in range(max_retries):
+            try:
+                symbol_re = _symbol_pattern(symbols)
+                content = self._call_llm(
+                    system_msg, user_content, SELECT_PAIR_MAX_TOKENS, api_timeout_seconds,
+                    is_complete=lambda text: _contains_symbol(symbol_re, text),
+                    idempotency_key=request_id
+                )
+
+                if content:
+                    full_response = content.strip().upper()
+                    logger.info(f"LLM selected symbol (raw): {full_response}")
+
+                    # Extract just the symbol name from the response
+                    # First check for exact matches in the symbols list
+                    match = symbol_re.search(full_response)
+                    if match:
+                        symbol = next(s for s in symbols if s.upper() == match.group(0))
+                        logger.info(f"Extracted symbol: {symbol}")
+                        return symbol
+
+                    # Next, try to find common forex pairs patterns like EUR/USD
+                    forex_pairs = re.findall(r'([A-Z]{3})/([A-Z]{3})', full_response)
+                    if forex_pairs:
+                        # Convert EUR/USD format to EURUSD format
+                        extracted_symbol = forex_pairs[0][0] + forex_pairs[0][1]
+                        if extracted_symbol in [s.upper() for s in symbols]:
+                            logger.info(f"Extracted symbol from forex pair notation: {extracted_symbol}")
+                            return extracted_symbol
+
+                    # If we couldn't extract a clear symbol, fall back to the first symbol
+                    logger.warning(f"Could not extract a valid symbol from LLM response. Defaulting to first symbol: {symbols[0]}")
+                    return symbols[0]
+
+            except RateLimitError:
+                logger.warning(f"OpenAI rate limit hit on attempt {attempt + 1}/{max_retries}, retrying in {backoff} seconds...")
+                if attempt < max_retries - 1:
+                    time.sleep(backoff)
+                    backoff *= 2
+            except Exception as e:
+                logger.error(f"Error selecting trading pair via LLM: {e}", exc_info=True)
+                if attempt < max_retries - 1:
+                    time.sleep(backoff)
+                    backoff *= 2
+
+        # Fallback to first symbol if all retries fail
+        logger.warning(f"All attempts to select pair failed. Defaulting to first symbol: {symbols[0]}")
+        return symbols[0]
@@ -0,0 +1,50 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Minimal process-wide circuit breaker for outbound LLM API calls.
+    Opens after `fail_threshold` consecutive failures and short-circuits callers
+    until `reset_timeout` seconds have passed, after which a single trial call is let through.
+    """
+    def __init__(self, fail_threshold: int = 5, reset_timeout: float = 30):
+        self.fail_threshold = fail_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """Return True while the breaker is tripped and the cooldown has not elapsed."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Half-open: let exactly this caller through as the trial call and keep everyone
+                # else short-circuited; restarting the cooldown means a probe that never reports
+                # back is replaced after another reset_timeout instead of wedging the breaker
+                self._opened_at = time.monotonic()
+                self._probing = True
+                self._failures = self.fail_threshold - 1
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_threshold and (self._opened_at is None or self._probing):
+                # A failed trial call re-opens for a full cooldown
+                self._opened_at = time.monotonic()
+                self._probing = False
+                logger.warning(f"Circuit breaker opened after {self._failures} consecutive failures; "
+                               f"short-circuiting calls for {self.reset_timeout}s")
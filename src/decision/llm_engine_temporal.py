@@ -1,15 +1,32 @@
-import os
+import re
+import json
 import time
+import asyncio
+import hashlib
+import threading
+import statistics
 import logging
-import traceback
-import numpy as np
-import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+import dataclasses
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple
+
+from ..data.historical_feed import NON_NUMERIC_INDICATORS
 
 # Get a specific logger for this module
 logger = logging.getLogger(__name__)
 
+# numpy is only needed for select_pair scoring; imported lazily on first use
+_np = None
+
+def _get_numpy():
+    global _np
+    if _np is None:
+        import numpy
+        _np = numpy
+    return _np
+
 # Try to import the OpenAI library and determine its version
 try:
     import openai
@@ -26,13 +43,13 @@ try:
         
         # Try v1.x imports
         if hasattr(openai, "OpenAI"):
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI
             OPENAI_V1 = True
             logger.info("Using OpenAI v1.x API based on module structure")
             
             # Define error classes for consistency
             try:
-                from openai.types.error import RateLimitError
+                from openai import RateLimitError
             except ImportError:
                 class RateLimitError(Exception): # type: ignore
                     pass
@@ -47,7 +64,7 @@ try:
     except Exception as e:
         logger.warning(f"Error detecting OpenAI version: {e}. Will attempt compatibility logic.")
         try:
-            from openai import OpenAI  # This will work for v1.x
+            from openai import OpenAI, AsyncOpenAI  # This will work for v1.x
             OPENAI_V1 = True
         except ImportError:
             OPENAI_V1 = False
@@ -55,11 +72,182 @@ except ImportError:
     logger.error("OpenAI library not installed. Run 'pip install openai'")
     raise ImportError("OpenAI library not installed. Run 'pip install openai'")
 
+# Optional tuned HTTP transport for the async client: pooled connections, and HTTP/2
+# multiplexing of concurrent requests when the h2 package is installed (pip install httpx[http2])
+try:
+    import httpx
+    try:
+        import h2  # noqa: F401
+        HTTP2_AVAILABLE = True
+    except ImportError:
+        HTTP2_AVAILABLE = False
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+# Optional faster JSON encoding of request bodies (pip install orjson)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+def _orjson_request_encoder(fallback):
+    """orjson version of the SDK's openapi_dumps; anything orjson rejects goes through `fallback`."""
+    def orjson_dumps(obj):
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return fallback(obj)
+    
+    orjson_dumps._orjson = True
+    return orjson_dumps
+
+def use_orjson_request_encoder():
+    """
+    Opt-in: swap the OpenAI SDK's stdlib-json request body encoder for orjson, which emits the same
+    compact UTF-8 bytes for plain chat payloads. This replaces a private SDK hook for every OpenAI
+    client in the process, and NaN/Infinity are sent as null where the SDK encoder would raise.
+    Returns True when orjson encoding is active.
+    """
+    if not ORJSON_AVAILABLE:
+        return False
+    try:
+        from openai import _base_client
+    except ImportError:
+        return False
+    original = getattr(_base_client, 'openapi_dumps', None)
+    if original is None:
+        # SDK versions that hand the body to httpx directly have no hook to replace
+        logger.debug("OpenAI SDK has no openapi_dumps hook; keeping default JSON encoding")
+        return False
+    if getattr(original, '_orjson', False):
+        return True
+    
+    _base_client.openapi_dumps = _orjson_request_encoder(original)
+    logger.info("Using orjson for OpenAI request bodies")
+    return True
+
+def _jsonable(obj):
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    return str(obj)
+
+def _serialize_trades(trades):
+    """Compact JSON of the recent trades for the prompt ("" when there are none)."""
+    if not trades:
+        return ""
+    trades = list(trades)
+    if ORJSON_AVAILABLE:
+        try:
+            # orjson encodes dataclasses such as TradeEntry natively
+            return orjson.dumps(trades).decode()
+        except TypeError:
+            pass
+    return json.dumps(trades, separators=(',', ':'), default=_jsonable)
+
+ASYNC_HTTP_MAX_CONNECTIONS = 32
+ASYNC_HTTP_MAX_KEEPALIVE = 16
+ASYNC_HTTP_TIMEOUT_SECONDS = 30.0
+ASYNC_HTTP_CONNECT_TIMEOUT_SECONDS = 3.0
+
+def _build_async_http_client():
+    """Return a pooled httpx.AsyncClient for AsyncOpenAI, or None to use the SDK default transport."""
+    if httpx is None:
+        return None
+    try:
+        # With an explicit transport the client ignores its own limits/http2 arguments,
+        # so the pool settings go on the transport itself
+        transport = httpx.AsyncHTTPTransport(
+            retries=0,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE)
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(ASYNC_HTTP_TIMEOUT_SECONDS, connect=ASYNC_HTTP_CONNECT_TIMEOUT_SECONDS)
+        )
+    except Exception as e:
+        logger.warning(f"Could not build tuned async HTTP client, using SDK default: {e}")
+        return None
+
+# Returned in place of a completion when every API attempt fails
+FALLBACK_RESPONSE = (
+    "Based on the provided market data and technical indicators, there isn't enough information to make "
+    "a confident prediction. The price action is unclear and there are no strong signals in either direction. NO TRADE"
+)
+
+PAIR_SELECTION_SYSTEM_MSG = (
+    "You are a professional trading expert selecting the best forex pair for a 5-minute binary options trade. "
+    "Analyze the technical indicators and market data to identify the pair with the strongest directional "
+    "signal (up or down). Consider volatility, momentum, RSI, and recent price movements. "
+    "For binary options trading, look for pairs with clear trends, overbought/oversold RSI conditions, "
+    "or significant momentum that suggest a high-probability move within the next 5 minutes. "
+    "IMPORTANT: Respond with ONLY the exact symbol name. For example, if EURUSD is the best choice, "
+    "respond with just 'EURUSD' and nothing else."
+)
+
+# Decision tokens, compiled once. NO TRADE is searched separately so it wins wherever it appears,
+# matching the original priority; word boundaries keep words like "OUTPUT" from reading as PUT.
+_NO_TRADE_RE = re.compile(r'\bNO\s+TRADE\b', re.IGNORECASE)
+_DIRECTION_RE = re.compile(r'\b(CALL|PUT)\b', re.IGNORECASE)
+_BATCH_DECISION_RE = re.compile(r'\[(\d+)\]\s*:\s*(CALL|PUT|NO\s+TRADE)\b', re.IGNORECASE)
+
+# A decision on a line of its own ("CALL", "Decision: **PUT**"), closed by a newline. Mentions inside
+# the analysis do not match, so a stream is only cut once the model has actually committed.
+_DECISION_LINE_RE = re.compile(
+    r'\n[ \t*]*(?:(?:FINAL[ \t]+)?(?:DECISION|ANSWER)[ \t*]*:[ \t*]*)?(NO[ \t]+TRADE|CALL|PUT)[ \t*.]*(?=\n)',
+    re.IGNORECASE
+)
+# Only the end of the streamed text is scanned for a decision line
+_STREAM_TAIL_CHARS = 64
+
+# In-process cache of completions for identical prompts; entries expire so a quote never outlives its candle
+RESPONSE_CACHE_MAXSIZE = 128
+RESPONSE_CACHE_TTL_SECONDS = 30
+# With a shared (Redis) cache, one worker answers a prompt while the others wait up to API_TIMEOUT_SECONDS;
+# the lock outlives a full retry loop so a slow answer is not requested twice
+SHARED_COMPLETION_LOCK_SECONDS = 35
+
+# Collector results (history, indicators, patterns, chart) are reused within one tick, so
+# select_pair and get_decision on the same symbol do not recompute them
+INDICATOR_CACHE_TTL_SECONDS = 15
+
+# Upper bound on threads used to analyse symbols concurrently in select_pair
+MAX_ANALYSIS_WORKERS = 8
+
+# Per-attempt timeout of the streamed (sync) calls, sized for the P95 of a non-reasoning completion rather
+# than the worst case; on a stream the SDK applies it between chunks, not to the whole answer
+API_TIMEOUT_SECONDS = 10
+# Output budget of one completion. Non-streamed (async) calls only return once all of it is generated,
+# so their timeout is sized for the full budget instead of the streaming one
+COMPLETION_MAX_TOKENS = 500
+NON_STREAMED_TIMEOUT_SECONDS = 60
+# Rolling window of successful async (non-streamed) call latencies; once enough samples exist, an async
+# call still outstanding at the window's P95 is hedged with a duplicate request. Sync calls are streamed
+# and may stop early, so they are not sampled: they would pull the threshold down.
+LATENCY_WINDOW = 100
+HEDGE_MIN_SAMPLES = 20
+
+# Fixed sampling seed so repeated prompts yield reproducible decisions
+COMPLETION_SEED = 42
+
+# Indicator keys rendered in their own lines of the historical summary rather than the indicator list
+SUMMARY_SECTION_KEYS = ('price_current', 'trend_direction')
+
+DIRECTIONAL_TRENDS = ('bullish', 'bullish_crossover', 'bearish', 'bearish_crossover')
+STRONG_PATTERNS = ('bullish_engulfing', 'bearish_engulfing', 'three_white_soldiers', 'three_black_crows')
+
 class TemporalLLMEngine:
-    def __init__(self, api_key, prompt_config=None, model="gpt-4"):  # updated default model
+    def __init__(self, api_key, prompt_config=None, model="gpt-4", shared_cache=None):  # updated default model
         self.api_key = api_key
         self.model = model
+        # Optional src.cache.SharedCache backing the response cache across workers
+        self.shared_cache = shared_cache
         self.client = None
+        self.aclient = None
         
         # Corrected f-string and use module-specific logger
         logger.info(f"API key provided: {'Yes' if self.api_key else 'No'}")
@@ -69,6 +257,12 @@ class TemporalLLMEngine:
             try:
                 # For v1.x API
                 self.client = OpenAI(api_key=self.api_key)
+                http_client = _build_async_http_client()
+                if http_client is not None:
+                    self.aclient = AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+                    logger.info(f"Async OpenAI client using pooled transport (HTTP/2: {HTTP2_AVAILABLE})")
+                else:
+                    self.aclient = AsyncOpenAI(api_key=self.api_key)
                 logger.info(f"Initialized OpenAI v1.x client with model: {self.model}")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI v1.x client: {e}")
@@ -81,8 +275,14 @@ class TemporalLLMEngine:
             except Exception as e:
                 logger.error(f"Failed to set OpenAI v0.x API key: {e}")
             
+        # Pick the API interface once instead of checking the SDK version on every attempt
+        self._do_call = self._call_v1 if OPENAI_V1 else self._call_v0
+        
         from .temporal_prompt_config import TemporalPromptConfig
         self.prompt_config = prompt_config or TemporalPromptConfig()
+        # The system prompt is invariant: build it once so every request shares a byte-identical
+        # prefix that OpenAI's automatic prompt caching can reuse. Per-call data goes in the user message.
+        self._system_msg = self.prompt_config.get_system_prompt()
         
         # Import HistoricalDataCollector here to avoid circular imports
         from ..data.historical_feed import HistoricalDataCollector
@@ -91,6 +291,17 @@ class TemporalLLMEngine:
         # Decision memory to track recent decisions
         self.decision_memory = {}
         
+        # (symbol, collector method, args) -> (monotonic timestamp, result)
+        self._indicator_cache = {}
+        self._indicator_cache_lock = threading.Lock()
+        
+        # Recent successful async call latencies in seconds, used for the hedging threshold
+        self._async_latencies = deque(maxlen=LATENCY_WINDOW)
+        
+        # LRU of prompt digest -> (monotonic timestamp, completion text)
+        self._response_cache = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        
     def initialize_historical_collector(self, data_feed, lookback_periods=60, timeframe_minutes=5):
         """Initialize the historical data collector with the provided data feed"""
         from ..data.historical_feed import HistoricalDataCollector
@@ -100,6 +311,30 @@ class TemporalLLMEngine:
             timeframe_minutes=timeframe_minutes
         )
         logger.info(f"Historical data collector initialized with {lookback_periods} periods of {timeframe_minutes}-min data")
+        self.historical_collector.add_candle_listener(self.on_new_candle)
+        self.on_new_candle(None)
+    
+    def on_new_candle(self, symbol):
+        """Drop cached collector results for `symbol` (all symbols if None) once new candles arrive."""
+        with self._indicator_cache_lock:
+            if symbol is None:
+                self._indicator_cache.clear()
+            else:
+                for key in [k for k in self._indicator_cache if k[0] == symbol]:
+                    del self._indicator_cache[key]
+    
+    def _collector_call(self, symbol, method, *args):
+        """Call `historical_collector.<method>(symbol, *args)`, reusing a result from the current tick."""
+        key = (symbol, method, args)
+        with self._indicator_cache_lock:
+            entry = self._indicator_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < INDICATOR_CACHE_TTL_SECONDS:
+            return entry[1]
+        
+        result = getattr(self.historical_collector, method)(symbol, *args)
+        with self._indicator_cache_lock:
+            self._indicator_cache[key] = (time.monotonic(), result)
+        return result
     
     def get_decision(self, symbol, market_data, recent_trades):
         """
@@ -120,37 +355,8 @@ class TemporalLLMEngine:
             logger.error("Historical data collector not initialized. Call initialize_historical_collector first.")
             return "NO TRADE"
             
-        # Get historical data and calculate indicators
         try:
-            # Fetch historical data and calculate technical indicators
-            historical_data = self.historical_collector.get_historical_data(symbol)
-            indicators = self.historical_collector.calculate_technical_indicators(symbol)
-            patterns = self.historical_collector.get_pattern_analysis(symbol)
-            
-            # Generate ASCII chart for visual representation
-            price_chart = self.historical_collector.get_price_chart_ascii(symbol, bars=20)
-            
-            # Prepare the context for the LLM
-            system_msg = self.prompt_config.get_system_prompt()
-            
-            # Format the historical data and indicators for the prompt
-            historical_summary = self._format_historical_summary(symbol, historical_data, indicators, patterns)
-            
-            # Check recent decisions from memory to provide continuity
-            decision_context = self._get_decision_memory_context(symbol)
-            
-            # Combine all information for the user prompt
-            user_content = self.prompt_config.get_user_prompt(
-                symbol=symbol,
-                price_chart=price_chart,
-                historical_summary=historical_summary,
-                current_price=market_data.get('price', 'unknown'),
-                recent_trades=recent_trades,
-                patterns=", ".join(patterns.get("patterns", [])),
-                decision_context=decision_context
-            )
-            
-            logger.debug(f"Prepared LLM prompt with temporal context for {symbol}")
+            system_msg, user_content = self._build_decision_prompt(symbol, market_data, recent_trades)
             
             # Call the API with retry logic
             decision = self._call_openai_api(system_msg, user_content)
@@ -164,6 +370,107 @@ class TemporalLLMEngine:
             logger.error(f"Error in get_decision for {symbol}: {e}", exc_info=True)
             return "NO TRADE"
     
+    async def aget_decision(self, symbol, market_data, recent_trades):
+        """Async variant of get_decision; the indicator pipeline runs in a worker thread."""
+        logger.debug(f"TemporalLLMEngine.aget_decision called for {symbol}")
+        
+        if not self.historical_collector:
+            logger.error("Historical data collector not initialized. Call initialize_historical_collector first.")
+            return "NO TRADE"
+            
+        try:
+            system_msg, user_content = await asyncio.to_thread(
+                self._build_decision_prompt, symbol, market_data, recent_trades
+            )
+            decision = await self._acall_openai_api(system_msg, user_content)
+            self._update_decision_memory(symbol, decision)
+            return decision
+            
+        except Exception as e:
+            logger.error(f"Error in aget_decision for {symbol}: {e}", exc_info=True)
+            return "NO TRADE"
+    
+    def _build_decision_prompt(self, symbol, market_data, recent_trades):
+        """Fetch history and indicators for `symbol` and return the (system, user) messages for a decision."""
+        # Prepare the context for the LLM
+        system_msg = self._system_msg
+        
+        # Combine all information for the user prompt
+        user_content = self.prompt_config.get_user_prompt(
+            **self._build_symbol_context(symbol, market_data, recent_trades)
+        )
+        
+        logger.debug(f"Prepared LLM prompt with temporal context for {symbol}")
+        return system_msg, user_content
+    
+    def _build_symbol_context(self, symbol, market_data, recent_trades):
+        """Collect the per-symbol prompt fields: chart, indicator summary, patterns and decision memory."""
+        # Fetch historical data and calculate technical indicators
+        historical_data = self._collector_call(symbol, 'get_historical_data')
+        indicators = self._collector_call(symbol, 'calculate_technical_indicators')
+        patterns = self._collector_call(symbol, 'get_pattern_analysis')
+        
+        # Generate ASCII chart for visual representation
+        price_chart = self._collector_call(symbol, 'get_price_chart_ascii', 20)
+        
+        # Format the historical data and indicators for the prompt
+        historical_summary = self._format_historical_summary(symbol, historical_data, indicators, patterns)
+        
+        # Check recent decisions from memory to provide continuity
+        decision_context = self._get_decision_memory_context(symbol)
+        
+        return dict(
+            symbol=symbol,
+            price_chart=price_chart,
+            historical_summary=historical_summary,
+            current_price=market_data.get('price', 'unknown'),
+            recent_trades=_serialize_trades(recent_trades),
+            patterns=", ".join(patterns.get("patterns", [])),
+            decision_context=decision_context
+        )
+    
+    def get_decisions_batch(self, symbols, market_data_map, recent_trades_map=None):
+        """
+        Get decisions for several symbols with a single API call.
+        
+        Args:
+            symbols: Symbols to decide on
+            market_data_map: Current market data point per symbol
+            recent_trades_map: Optional recent trading history per symbol
+            
+        Returns:
+            Dict mapping each symbol to "CALL", "PUT", or "NO TRADE"
+        """
+        if not symbols:
+            return {}
+        if not self.historical_collector:
+            logger.error("Historical data collector not initialized. Call initialize_historical_collector first.")
+            return {symbol: "NO TRADE" for symbol in symbols}
+        
+        recent_trades_map = recent_trades_map or {}
+        sections = []
+        for symbol in symbols:
+            try:
+                sections.append(self._build_symbol_context(
+                    symbol, market_data_map.get(symbol, {}), recent_trades_map.get(symbol, [])
+                ))
+            except Exception as e:
+                logger.error(f"Error preparing batch context for {symbol}: {e}", exc_info=True)
+                sections.append(dict(symbol=symbol, price_chart="Unavailable",
+                                     historical_summary="Unavailable", current_price="unknown"))
+        
+        user_content = self.prompt_config.get_batch_user_prompt(sections)
+        response = self._request_completion(self._system_msg, user_content)
+        parsed = self._parse_batch_response(response, len(symbols))
+        
+        decisions = {}
+        for idx, symbol in enumerate(symbols, start=1):
+            decision = parsed.get(idx, "NO TRADE")
+            self._update_decision_memory(symbol, decision)
+            decisions[symbol] = decision
+        logger.debug(f"Batch decisions: {decisions}")
+        return decisions
+    
     def _format_historical_summary(self, symbol, historical_data, indicators, patterns):
         """Format the historical data and indicators for the prompt"""
         # Summarize the historical data
@@ -181,18 +488,12 @@ class TemporalLLMEngine:
             relationship = "above" if indicators['ma_14'] > indicators['ma_50'] else "below"
             trend_description += f"The 14-period MA is {relationship} the 50-period MA. "
         
-        # Format technical indicator values
-        indicators_formatted = []
-        for key, value in indicators.items():
-            # Skip some keys that are used in other sections
-            if key == 'price_current' or key == 'trend_direction':
-                continue
-                
-            if isinstance(value, float):
-                formatted_value = f"{value:.5f}" if value < 0.1 else f"{value:.2f}"
-                indicators_formatted.append(f"{key}: {formatted_value}")
-            else:
-                indicators_formatted.append(f"{key}: {value}")
+        # Format technical indicator values in one pass; the collector marks its few label-valued
+        # keys, so numeric ones are known up front instead of type-checking each value
+        indicators_formatted = [
+            f"{k}: {v}" if k in NON_NUMERIC_INDICATORS else f"{k}: {v:.5f}" if v < 0.1 else f"{k}: {v:.2f}"
+            for k, v in indicators.items() if k not in SUMMARY_SECTION_KEYS
+        ]
         
         # Summarize patterns
         pattern_str = ", ".join(patterns.get("patterns", []))
@@ -215,65 +516,196 @@ class TemporalLLMEngine:
             
         return summary
     
+    def _completion_kwargs(self, system_msg, user_content, timeout=API_TIMEOUT_SECONDS):
+        """Request arguments shared by the sync and async chat completion calls."""
+        kwargs = dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_content}
+            ],
+            max_completion_tokens=COMPLETION_MAX_TOKENS,  # Renamed from max_tokens to max_completion_tokens
+            seed=COMPLETION_SEED,
+            timeout=timeout
+        )
+        # o-series reasoning models only accept the default temperature
+        if not self._is_reasoning_model():
+            kwargs["temperature"] = 0
+        return kwargs
+    
+    def _is_reasoning_model(self):
+        return self.model[:2] in ("o1", "o3", "o4")
+    
     def _call_openai_api(self, system_msg, user_content):
-        """Call the OpenAI API with retry logic and proper fallbacks"""
+        """Call the OpenAI API with retry logic and return the parsed decision"""
+        return self._parse_response(self._request_completion(system_msg, user_content, stop_on_decision=True))
+    
+    def _call_v1(self, system_msg, user_content, stop_on_decision=False):
+        """Stream a completion through the v1.x client and return its text"""
+        stream = self.client.chat.completions.create(
+            stream=True, **self._completion_kwargs(system_msg, user_content)
+        )
+        return self._read_stream(stream, stop_on_decision)
+    
+    def _call_v0(self, system_msg, user_content, stop_on_decision=False):
+        """Stream a completion through the legacy v0.x interface and return its text"""
+        kwargs = self._completion_kwargs(system_msg, user_content)
+        kwargs["max_tokens"] = kwargs.pop("max_completion_tokens")
+        kwargs["request_timeout"] = kwargs.pop("timeout")
+        stream = openai.ChatCompletion.create(stream=True, **kwargs) # type: ignore
+        return self._read_stream(stream, stop_on_decision, legacy=True)
+    
+    def _read_stream(self, stream, stop_on_decision=False, legacy=False):
+        """
+        Accumulate a streamed completion. With `stop_on_decision` the stream is closed as soon as
+        a standalone decision line arrives, skipping whatever the model would write after it.
+        `legacy` streams (v0.x) yield plain dicts instead of chunk objects.
+        """
+        parts = []
+        tail = ""
+        total_len = 0
+        try:
+            for chunk in stream:
+                if legacy:
+                    delta = chunk["choices"][0]["delta"].get("content") if chunk["choices"] else None
+                else:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                if stop_on_decision:
+                    total_len += len(delta)
+                    tail = (tail + delta)[-_STREAM_TAIL_CHARS:]
+                    # While the whole response still fits in the tail, treat its start as a line start
+                    window = tail if total_len > len(tail) else "\n" + tail
+                    if _DECISION_LINE_RE.search(window):
+                        logger.debug("Decision line received, closing completion stream early")
+                        break
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+        return "".join(parts) or None
+    
+    @staticmethod
+    def _prompt_key(system_msg, user_content):
+        return hashlib.blake2b((system_msg + user_content).encode(), digest_size=16).digest()
+    
+    @staticmethod
+    def _shared_key(key):
+        return f"dec:{key.hex()}"
+    
+    def _get_cached_response(self, key):
+        """
+        Return the cached completion for `key` if it is still fresh, refreshing its LRU position.
+        Local misses fall through to the shared cache when one is configured.
+        """
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is not None:
+                stored_at, content = entry
+                if time.monotonic() - stored_at <= RESPONSE_CACHE_TTL_SECONDS:
+                    self._response_cache.move_to_end(key)
+                    return content
+                del self._response_cache[key]
+        if self.shared_cache is None:
+            return None
+        content = self.shared_cache.get(self._shared_key(key))
+        if content is not None:
+            self._store_response(key, content, share=False)
+        return content
+    
+    def _store_response(self, key, content, share=True):
+        with self._response_cache_lock:
+            self._response_cache[key] = (time.monotonic(), content)
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > RESPONSE_CACHE_MAXSIZE:
+                self._response_cache.popitem(last=False)
+        if share and self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), content, RESPONSE_CACHE_TTL_SECONDS)
+    
+    @staticmethod
+    def _retry_delay(error, backoff):
+        """
+        Seconds to wait after a rate limit: the server's Retry-After when given (capped at
+        API_TIMEOUT_SECONDS, so a huge value cannot stall the caller), else the backoff.
+        """
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(max(float(retry_after), 0.0), API_TIMEOUT_SECONDS) if retry_after is not None else backoff
+        except (TypeError, ValueError):
+            return backoff
+    
+    def _hedge_threshold(self):
+        """P95 of recent async call latencies, or None until enough calls have been observed."""
+        if len(self._async_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return statistics.quantiles(self._async_latencies, n=20)[-1]
+    
+    def _request_completion(self, system_msg, user_content, stop_on_decision=False):
+        """Call the OpenAI API with retry logic and proper fallbacks, returning the raw completion text"""
+        cache_key = self._prompt_key(system_msg, user_content)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            logger.debug("Identical prompt answered from response cache")
+            return cached
+        
+        if self.shared_cache is None:
+            return self._fetch_completion(system_msg, user_content, stop_on_decision, cache_key)
+        shared_key = self._shared_key(cache_key)
+        if not self.shared_cache.acquire(shared_key, SHARED_COMPLETION_LOCK_SECONDS):
+            # Another worker is already asking this exact prompt; use its answer if it arrives in time
+            content = self.shared_cache.wait_for(shared_key, API_TIMEOUT_SECONDS)
+            if content is not None:
+                self._store_response(cache_key, content, share=False)
+                return content
+        try:
+            return self._fetch_completion(system_msg, user_content, stop_on_decision, cache_key)
+        finally:
+            self.shared_cache.release(shared_key)
+    
+    def _fetch_completion(self, system_msg, user_content, stop_on_decision, cache_key):
+        """The OpenAI call with retries behind _request_completion; successful answers are cached under `cache_key`"""
         max_retries = 3
         backoff = 1
-        api_timeout_seconds = 30
-        
-        # Create a dummy response simulation for when API fails
-        def create_dummy_response():
-            logger.warning(f"Using fallback dummy response due to API issues")
-            return "Based on the provided market data and technical indicators, there isn't enough information to make a confident prediction. The price action is unclear and there are no strong signals in either direction. NO TRADE"
+        content = None
         
         for attempt in range(max_retries):
             try:
                 logger.debug(f"Attempt {attempt+1}/{max_retries} to call OpenAI API with model: {self.model}")
                 
-                # Use the configured model
-                current_model_to_use = self.model
-                
-                content = None
+                try:
+                    # Version-specific call bound once in __init__
+                    content = self._do_call(system_msg, user_content, stop_on_decision)
+                    if content:
+                        logger.debug("Successfully called OpenAI API")
+                except RateLimitError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error with OpenAI API call: {str(e)}")
+                    # If the call fails, content will remain None, and it will proceed to dummy response or retry logic
                 
-                # Use the appropriate API based on version
-                if 'OPENAI_V1' in globals() and OPENAI_V1 and self.client:
-                    try:
-                        # Clean v1.x API call with proper error handling
-                        response = self.client.chat.completions.create(
-                            model=current_model_to_use,
-                            messages=[
-                                {"role": "system", "content": system_msg},
-                                {"role": "user", "content": user_content}
-                            ],
-                            max_completion_tokens=500,  # Renamed from max_tokens to max_completion_tokens
-                            temperature=1  # Changed from 0.7 to 1
-                        )
-                        if hasattr(response, 'choices') and len(response.choices) > 0:
-                            content = response.choices[0].message.content
-                            logger.debug("Successfully called OpenAI v1.x API")
-                    except Exception as e:
-                        logger.error(f"Error with OpenAI v1.x API call: {str(e)}")
-                        # If v1.x fails, content will remain None, and it will proceed to dummy response or retry logic
-                
-                # If v1.x API call was successful and produced content, break from retry loop
+                # If the API call was successful and produced content, break from retry loop
                 if content:
+                    self._store_response(cache_key, content)
                     break
                 
-                # If we reached here without a response (e.g. v1.x API failed or was not attempted and content is still None)
+                # If we reached here without a response (e.g. the API call failed and content is still None)
                 if attempt == max_retries - 1:
                     # Last attempt failed, use fallback
                     logger.warning("All API attempts failed. Using fallback dummy response.")
-                    content = create_dummy_response()
+                    content = FALLBACK_RESPONSE
                 else:
                     # Retry with backoff
                     logger.info(f"API call failed on attempt {attempt + 1}. Retrying in {backoff}s...")
                     time.sleep(backoff)
                     backoff *= 2
                 
-            except RateLimitError:
+            except RateLimitError as e:
                 logger.warning(f"OpenAI rate limit hit on attempt {attempt + 1}/{max_retries}")
                 if attempt < max_retries - 1:
-                    time.sleep(backoff)
+                    time.sleep(self._retry_delay(e, backoff))
                     backoff *= 2
                 else:
                     logger.error("OpenAI rate limit exceeded after all retries")
@@ -285,34 +717,96 @@ class TemporalLLMEngine:
                     backoff *= 2
                 else:
                     logger.error("Failed to call OpenAI API after all retries")
-                    return self._parse_response(create_dummy_response())
+                    return FALLBACK_RESPONSE
         
-        # Parse the response
         if content:
-            logger.debug(f"LLM decision raw content: '{content}'")
-            return self._parse_response(content)
-        else:
-            logger.error("No response content from OpenAI API")
-            return "NO TRADE"
+            logger.debug(f"LLM raw content: '{content}'")
+            return content
+        logger.error("No response content from OpenAI API")
+        return "NO TRADE"
+    
+    async def _acall_openai_api(self, system_msg, user_content):
+        """Async variant of _call_openai_api"""
+        return self._parse_response(await self._arequest_completion(system_msg, user_content))
+    
+    async def _arequest_completion(self, system_msg, user_content):
+        """Async variant of _request_completion using AsyncOpenAI, so calls for several symbols can overlap"""
+        if not self.aclient:
+            # No async client (legacy SDK or failed init): run the blocking call off the event loop
+            return await asyncio.to_thread(self._request_completion, system_msg, user_content)
+        
+        cache_key = self._prompt_key(system_msg, user_content)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            logger.debug("Identical prompt answered from response cache")
+            return cached
+        
+        max_retries = 3
+        backoff = 1
+        
+        for attempt in range(max_retries):
+            delay = backoff
+            try:
+                logger.debug(f"Async attempt {attempt+1}/{max_retries} to call OpenAI API with model: {self.model}")
+                response = await self._ahedged_create(
+                    self._completion_kwargs(system_msg, user_content, timeout=NON_STREAMED_TIMEOUT_SECONDS)
+                )
+                if hasattr(response, 'choices') and len(response.choices) > 0:
+                    content = response.choices[0].message.content
+                    if content:
+                        logger.debug(f"LLM raw content: '{content}'")
+                        self._store_response(cache_key, content)
+                        return content
+                logger.info(f"API call returned no content on attempt {attempt + 1}")
+            except RateLimitError as e:
+                logger.warning(f"OpenAI rate limit hit on attempt {attempt + 1}/{max_retries}")
+                if attempt == max_retries - 1:
+                    logger.error("OpenAI rate limit exceeded after all retries")
+                    return "NO TRADE"
+                delay = self._retry_delay(e, backoff)
+            except Exception as e:
+                logger.error(f"Error calling OpenAI API: {e}", exc_info=True)
+            
+            if attempt < max_retries - 1:
+                logger.info(f"Retrying in {delay}s...")
+                await asyncio.sleep(delay)
+                backoff *= 2
+        
+        logger.warning("All API attempts failed. Using fallback dummy response.")
+        return FALLBACK_RESPONSE
     
     def _parse_response(self, response_content):
         """Parse the LLM response to extract the decision"""
-        cleaned = response_content.strip().upper()
+        # The prompt asks the model to end with its decision: a final standalone decision line is authoritative
+        decision_lines = _DECISION_LINE_RE.findall("\n" + response_content + "\n")
+        if decision_lines:
+            last = decision_lines[-1].upper()
+            return "NO TRADE" if last.startswith("NO") else last
         
         # Check for NO TRADE first
-        if "NO TRADE" in cleaned:
+        if _NO_TRADE_RE.search(response_content):
             return "NO TRADE"
         
         # Check for CALL or PUT anywhere in the response
-        if "CALL" in cleaned:
-            return "CALL"
-        if "PUT" in cleaned:
-            return "PUT"
+        match = _DIRECTION_RE.search(response_content)
+        if match:
+            return match.group(1).upper()
         
         # Fallback for unexpected responses
         logger.warning(f"LLM response did not contain CALL, PUT, or NO TRADE. Defaulting to NO TRADE.")
         return "NO TRADE"
     
+    def _parse_batch_response(self, response_content, count):
+        """Parse `[<idx>]: DECISION` lines into {idx: decision}; indices outside 1..count are ignored."""
+        decisions = {}
+        for idx, decision in _BATCH_DECISION_RE.findall(response_content):
+            idx = int(idx)
+            if 1 <= idx <= count and idx not in decisions:
+                decisions[idx] = "NO TRADE" if decision[0] in "nN" else decision.upper()
+        if len(decisions) < count:
+            logger.warning(f"Batch response covered {len(decisions)}/{count} symbols; missing ones default to NO TRADE.")
+        return decisions
+    
     def _get_decision_memory_context(self, symbol):
         """Get context from previous decisions for continuity"""
         if symbol not in self.decision_memory:
@@ -325,30 +819,68 @@ class TemporalLLMEngine:
         context_lines.append(f"Previous decisions for {symbol}:")
         
         for timestamp, decision in memory["decisions"]:
-            time_str = timestamp.strftime("%H:%M:%S")
+            # Stored as a raw epoch float; only formatted when the context is rendered
+            time_str = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
             context_lines.append(f"- {time_str}: {decision}")
             
         return "\n".join(context_lines)
     
     def _update_decision_memory(self, symbol, decision):
         """Update the decision memory with the latest decision"""
-        now = datetime.now()
+        now = time.time()
         
         if symbol not in self.decision_memory:
+            # Bounded: only the last 5 decisions are kept, older ones drop off automatically
             self.decision_memory[symbol] = {
-                "decisions": []
+                "decisions": deque(maxlen=5)
             }
         
         # Add the new decision
         self.decision_memory[symbol]["decisions"].append((now, decision))
+    
+    async def _ahedged_create(self, kwargs):
+        """
+        Await a chat completion; if it is still outstanding at the recent P95 latency, send a
+        duplicate request and take whichever succeeds first, cancelling the other.
+        Outstanding requests are cancelled and awaited on every exit, including cancellation of the caller.
+        """
+        # Each request's own start time, so a winning hedge records its latency rather than the first's
+        started = {}
+        
+        def send():
+            task = asyncio.ensure_future(self.aclient.chat.completions.create(**kwargs))
+            started[task] = time.monotonic()
+            return task
         
-        # Keep only last 5 decisions
-        if len(self.decision_memory[symbol]["decisions"]) > 5:
-            self.decision_memory[symbol]["decisions"] = self.decision_memory[symbol]["decisions"][-5:]
+        tasks = {send()}
+        try:
+            hedge_after = self._hedge_threshold()
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    logger.info(f"No response after P95 latency {hedge_after:.2f}s, sending hedged request")
+                    tasks.add(send())
+            
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._async_latencies.append(time.monotonic() - started[task])
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
     
     def select_pair(self, symbols, data_feed=None):
         """
         Select the best trading pair among the provided symbols using the LLM and market data.
+        Blocking twin of aselect_pair (same ranking, sync client), safe to call with or without
+        a running event loop.
         
         Args:
             symbols: List of symbol names to choose from
@@ -363,95 +895,136 @@ class TemporalLLMEngine:
         if not self.historical_collector and data_feed:
             self.initialize_historical_collector(data_feed)
         
-        # Prepare comparative analysis of all symbols
-        symbol_analysis = {}
+        results = []
+        if self.historical_collector:
+            with ThreadPoolExecutor(max_workers=min(MAX_ANALYSIS_WORKERS, len(symbols))) as executor:
+                results = list(executor.map(self._analyze_one_symbol, symbols))
         
-        for symbol in symbols:
-            try:
-                # Skip if historical collector not available
-                if not self.historical_collector:
-                    continue
-                    
-                # Get indicators for this symbol
-                indicators = self.historical_collector.calculate_technical_indicators(symbol)
-                patterns = self.historical_collector.get_pattern_analysis(symbol)
-                
-                # Create a trading opportunity score (higher is better)
-                score = 0
-                
-                # Check for strong directional signals
-                if 'trend_direction' in indicators:
-                    if indicators['trend_direction'] in ('bullish', 'bullish_crossover'):
-                        score += 2
-                    elif indicators['trend_direction'] in ('bearish', 'bearish_crossover'):  
-                        score += 2
-                
-                # Check RSI for overbought/oversold conditions (good for binary options)
-                if 'rsi_14' in indicators:
-                    rsi = indicators['rsi_14']
-                    if rsi < 30 or rsi > 70:  # Strong oversold or overbought
-                        score += 3
-                    elif rsi < 40 or rsi > 60:  # Moderate signal
-                        score += 1
-                
-                # Check for pattern signals
-                if patterns.get('patterns'):
-                    score += len(patterns['patterns'])
-                    # Give extra points for strong patterns
-                    strong_patterns = ['bullish_engulfing', 'bearish_engulfing', 
-                                      'three_white_soldiers', 'three_black_crows']
-                    for pattern in patterns['patterns']:
-                        if pattern in strong_patterns:
-                            score += 2
-                
-                # Check for volume confirmation
-                if patterns.get('volume_signal') == 'strong':
-                    score += 2
-                
-                # Store analysis and score
-                symbol_analysis[symbol] = {
-                    'score': score,
-                    'indicators': indicators,
-                    'patterns': patterns.get('patterns', [])
-                }
-                
-                logger.debug(f"Symbol {symbol} analysis: score={score}")
-                
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol}: {e}")
-                continue
+        selected, top_candidates, user_content = self._rank_pairs(symbols, results)
+        if selected:
+            return selected
+        response = self._request_completion(PAIR_SELECTION_SYSTEM_MSG, user_content)
+        return self._pick_pair(symbols, top_candidates, response)
+    
+    async def aselect_pair(self, symbols, data_feed=None):
+        """
+        Async pair selection: every symbol is analysed concurrently, then a single
+        LLM call picks among the top candidates when no symbol scores high enough on its own.
+        """
+        logger.info(f"Selecting trading pair from symbols: {symbols}")
+        if not symbols:
+            logger.error("No symbols provided to select_pair.")
+            return None
+        
+        # Ensure historical collector is initialized
+        if not self.historical_collector and data_feed:
+            self.initialize_historical_collector(data_feed)
+        
+        results = []
+        if self.historical_collector:
+            # Indicator maths is pandas/NumPy heavy and releases the GIL, so symbols are analysed on a
+            # small bounded pool; the dict is assembled only after every worker has finished
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=min(MAX_ANALYSIS_WORKERS, len(symbols))) as executor:
+                results = await asyncio.gather(
+                    *[loop.run_in_executor(executor, self._analyze_one_symbol, symbol) for symbol in symbols]
+                )
+        
+        selected, top_candidates, user_content = self._rank_pairs(symbols, results)
+        if selected:
+            return selected
+        response = await self._arequest_completion(PAIR_SELECTION_SYSTEM_MSG, user_content)
+        return self._pick_pair(symbols, top_candidates, response)
+    
+    def _rank_pairs(self, symbols, results):
+        """
+        Score the (symbol, analysis) results. Returns (selected, None, None) for a clear winner,
+        else (None, top_candidates, pair-selection prompt) for the LLM to decide.
+        """
+        # Prepare comparative analysis of all symbols
+        symbol_analysis = {symbol: analysis for symbol, analysis in results if analysis}
         
         # If we have analysis for at least one symbol
         if symbol_analysis:
-            # Sort symbols by score (descending)
-            ranked_symbols = sorted(symbol_analysis.keys(), 
-                                   key=lambda s: symbol_analysis[s]['score'],
-                                   reverse=True)
+            analysed = list(symbol_analysis)
+            scores = self._score_symbols([symbol_analysis[s] for s in analysed])
+            for symbol, score in zip(analysed, scores.tolist()):
+                symbol_analysis[symbol]['score'] = score
+                logger.debug(f"Symbol {symbol} analysis: score={score}")
             
-            # If top symbol has a good score, return it directly
-            if symbol_analysis[ranked_symbols[0]]['score'] >= 5:
-                selected = ranked_symbols[0]
+            # Clear winner first: argmax is a single pass and returns the earliest of tied best scores
+            np = _get_numpy()
+            best = int(np.argmax(scores))
+            if scores[best] >= 5:
+                selected = analysed[best]
                 logger.info(f"Selected {selected} with highest score: {symbol_analysis[selected]['score']}")
-                return selected
-                
+                return selected, None, None
+            
+            # Top 3 by score (descending) for the LLM fallback; the stable sort keeps ties in
+            # input order, including ties straddling the cutoff
+            top = np.argsort(-scores, kind='stable')[:3]
+            
             # Otherwise, let LLM make the final decision with the top candidates
-            top_candidates = ranked_symbols[:min(3, len(ranked_symbols))]
+            top_candidates = [analysed[i] for i in top]
         else:
             # If no analysis, use all symbols as candidates
             top_candidates = symbols
         
         # Fall back to LLM for final decision among top candidates
-        system_msg = (
-            "You are a professional trading expert selecting the best forex pair for a 5-minute binary options trade. "
-            "Analyze the technical indicators and market data to identify the pair with the strongest directional "
-            "signal (up or down). Consider volatility, momentum, RSI, and recent price movements. "
-            "For binary options trading, look for pairs with clear trends, overbought/oversold RSI conditions, "
-            "or significant momentum that suggest a high-probability move within the next 5 minutes. "
-            "IMPORTANT: Respond with ONLY the exact symbol name. For example, if EURUSD is the best choice, "
-            "respond with just 'EURUSD' and nothing else."
-        )
+        return None, top_candidates, self._format_pair_selection_prompt(top_candidates, symbol_analysis)
+    
+    @staticmethod
+    def _pick_pair(symbols, top_candidates, response):
+        """Extract the chosen symbol from the LLM response, defaulting to the first candidate."""
+        for symbol in symbols:
+            if symbol.upper() in response.upper():
+                logger.info(f"LLM selected symbol: {symbol}")
+                return symbol
         
-        # Format the analysis for the LLM
+        # Default to first candidate if no match
+        logger.warning(f"Could not extract valid symbol from LLM response: '{response}'. Defaulting to {top_candidates[0]}")
+        return top_candidates[0]
+    
+    def _analyze_one_symbol(self, symbol) -> Tuple[str, Optional[dict]]:
+        """Collect the indicators and patterns used to score `symbol`; the analysis is None if it fails."""
+        try:
+            indicators = self._collector_call(symbol, 'calculate_technical_indicators')
+            patterns = self._collector_call(symbol, 'get_pattern_analysis')
+            return symbol, {
+                'indicators': indicators,
+                'patterns': patterns.get('patterns', []),
+                'volume_signal': patterns.get('volume_signal')
+            }
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {e}")
+            return symbol, None
+    
+    @staticmethod
+    def _score_symbols(analyses):
+        """
+        Vectorized trading opportunity score (higher is better) for a list of _analyze_one_symbol analyses:
+        +2 for a directional trend, +3 for RSI beyond 30/70 or +1 beyond 40/60 (good for binary options),
+        +1 per detected pattern plus 2 more per strong pattern, +2 for strong volume confirmation.
+        """
+        np = _get_numpy()
+        indicators = [a['indicators'] for a in analyses]
+        trend = np.array([ind.get('trend_direction', '') for ind in indicators], dtype=object)
+        # Missing RSI scores like a neutral reading
+        rsi = np.array([ind.get('rsi_14', 50.0) for ind in indicators], dtype=float)
+        pattern_counts = np.array([len(a['patterns']) for a in analyses])
+        strong_counts = np.array([sum(p in STRONG_PATTERNS for p in a['patterns']) for a in analyses])
+        volume_strong = np.array([a['volume_signal'] == 'strong' for a in analyses])
+        
+        return (
+            np.isin(trend, DIRECTIONAL_TRENDS) * 2
+            + np.where((rsi < 30) | (rsi > 70), 3, np.where((rsi < 40) | (rsi > 60), 1, 0))
+            + pattern_counts
+            + strong_counts * 2
+            + volume_strong * 2
+        )
+    
+    def _format_pair_selection_prompt(self, top_candidates, symbol_analysis):
+        """Format the per-symbol analysis of the top candidates for the pair-selection prompt"""
         user_content = f"Available symbols: {top_candidates}\n\n"
         if symbol_analysis:
             user_content += "Symbol Analysis:\n"
@@ -476,16 +1049,4 @@ class TemporalLLMEngine:
                         user_content += f"  Patterns: {', '.join(analysis['patterns'])}\n"
         else:
             user_content += "No technical data available. Please select based on general forex market knowledge."
-        
-        # Call the OpenAI API
-        decision = self._call_openai_api(system_msg, user_content)
-        
-        # Extract symbol from the response
-        for symbol in symbols:
-            if symbol.upper() in decision.upper():
-                logger.info(f"LLM selected symbol: {symbol}")
-                return symbol
-        
-        # Default to first candidate if no match
-        logger.warning(f"Could not extract valid symbol from LLM response: '{decision}'. Defaulting to {top_candidates[0]}")
-        return top_candidates[0]
+        return user_content
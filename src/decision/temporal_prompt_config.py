@@ -1,3 +1,4 @@
+import string
 from typing import Dict, Optional
 
 class TemporalPromptConfig:
@@ -46,7 +47,32 @@ class TemporalPromptConfig:
             "First provide your analysis, then end your response with CALL, PUT, or NO TRADE."
         )
         
+        # Batch prompting: several symbols in one request, one decision line per index
+        self.batch_prompt_header = (
+            "Analyze each of the following symbols independently for a 5-minute binary options trade. "
+            "Respond with exactly one line per symbol in the form `[<idx>]: CALL|PUT|NO TRADE`, "
+            "using the index shown before each symbol, and nothing else."
+        )
+        
+        self.batch_section_template = (
+            "[{idx}] {symbol}\n"
+            "PRICE CHART (last candles):\n"
+            "{price_chart}\n"
+            "TECHNICAL ANALYSIS:\n"
+            "{historical_summary}\n"
+            "CURRENT PRICE: {current_price}\n"
+            "DETECTED PATTERNS: {patterns}\n"
+            "PREVIOUS DECISIONS:\n"
+            "{decision_context}\n"
+            "RECENT TRADE HISTORY:\n"
+            "{recent_trades}"
+        )
+        
         self.confidence_threshold = 0.7
+        
+        # Template pre-split into (literal, field) pairs so each prompt is a plain join
+        self._parsed_template = None
+        self._user_prompt_parts = None
 
     def get_system_prompt(self) -> str:
         """Return the system prompt for the LLM."""
@@ -71,7 +97,7 @@ class TemporalPromptConfig:
         Returns:
             Formatted user prompt
         """
-        return self.user_prompt_template.format(
+        values = dict(
             symbol=symbol,
             price_chart=price_chart,
             historical_summary=historical_summary,
@@ -80,6 +106,51 @@ class TemporalPromptConfig:
             recent_trades=recent_trades or "No recent trades",
             decision_context=decision_context or "No previous decisions"
         )
+        parts = self._get_user_prompt_parts()
+        if parts is None:
+            return self.user_prompt_template.format(**values)
+        return "".join(literal + (str(values[field]) if field else "") for literal, field in parts)
+
+    def _get_user_prompt_parts(self):
+        """
+        Split user_prompt_template once into (literal, field name) pairs, re-splitting only if the
+        template is replaced. Returns None when a field uses a format spec or conversion that a plain
+        str() join cannot reproduce.
+        """
+        if self._parsed_template is not self.user_prompt_template:
+            parts = []
+            for literal, field, spec, conversion in string.Formatter().parse(self.user_prompt_template):
+                if spec or conversion:
+                    parts = None
+                    break
+                parts.append((literal, field))
+            self._user_prompt_parts = tuple(parts) if parts is not None else None
+            self._parsed_template = self.user_prompt_template
+        return self._user_prompt_parts
+
+    def get_batch_user_prompt(self, sections: list) -> str:
+        """
+        Format a single user prompt covering several symbols.
+        
+        Args:
+            sections: One dict per symbol with the get_user_prompt fields; indices start at 1
+            
+        Returns:
+            Formatted batch user prompt
+        """
+        parts = [self.batch_prompt_header]
+        for idx, section in enumerate(sections, start=1):
+            parts.append(self.batch_section_template.format(
+                idx=idx,
+                symbol=section["symbol"],
+                price_chart=section["price_chart"],
+                historical_summary=section["historical_summary"],
+                current_price=section["current_price"],
+                patterns=section.get("patterns") or "None detected",
+                recent_trades=section.get("recent_trades") or "No recent trades",
+                decision_context=section.get("decision_context") or "No previous decisions"
+            ))
+        return "\n\n".join(parts)
 
     def is_trade_recommended(self, confidence: float) -> bool:
         """
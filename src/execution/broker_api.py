@@ -2,21 +2,67 @@ import random
 import logging
 import uuid
 import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# How long a fetched quote is reused for further trades on the same asset
+DEFAULT_QUOTE_CACHE_TTL_SECONDS = 0.5
+# How long other workers wait on (and the shared cache locks) one worker's quote fetch
+QUOTE_FETCH_LOCK_SECONDS = 5
+# Initial slot count of the open-trade arrays; doubled whenever full
+OPEN_TRADES_INITIAL_CAPACITY = 64
+# A trade wins when (exit - entry) * sign > 0; unknown directions get 0 and always lose
+DIRECTION_SIGNS = {"CALL": 1, "PUT": -1}
+# settle_expired results kept for a later check_trade_result/acheck_trade_result; oldest dropped first
+SETTLED_RESULTS_MAXSIZE = 4096
+
 class BrokerAPI:
     """
     Simulated BrokerAPI for trading.
     Determines win/loss based on actual price movement from entry over a set duration,
     using a provided data_feed instance.
+
+    place_trade/check_trade_result block until expiry and are what run_session uses: each decision
+    depends on the previous outcome. aplace_trade/acheck_trade_result/await_many (and settle_expired)
+    are a library API for async callers that keep several trades open at once.
     """
-    def __init__(self, ssid, data_feed_instance):
+    def __init__(self, ssid, data_feed_instance, quote_cache_ttl=DEFAULT_QUOTE_CACHE_TTL_SECONDS, shared_cache=None):
         self.connected = True
-        self.active_trades = {}  # Stores trade_id: {details}
+        self.active_trades = {}  # Stores trade_id: {asset, amount, direction, duration_seconds}
+        # Numeric state of the open trades (struct-of-arrays), the only copy of entry price, expiry and
+        # direction sign, so settle_expired can settle them in one vectorized pass;
+        # slot i belongs to _slot_ids[i], the first _n_open slots are in use
+        self._n_open = 0
+        self._entry = np.empty(OPEN_TRADES_INITIAL_CAPACITY, dtype=np.float64)
+        self._expiry = np.empty(OPEN_TRADES_INITIAL_CAPACITY, dtype=np.float64)
+        self._dir = np.empty(OPEN_TRADES_INITIAL_CAPACITY, dtype=np.int8)
+        self._asset_idx = np.empty(OPEN_TRADES_INITIAL_CAPACITY, dtype=np.int32)
+        self._slot_ids = np.empty(OPEN_TRADES_INITIAL_CAPACITY, dtype=object)
+        self._id_to_slot = {}
+        self._asset_codes = {}  # asset -> index into _assets
+        self._assets = []
+        self.pending = {}  # trade_id: asyncio.Task settling the trade at expiry (async API only)
+        # trade_id: won for trades settle_expired settled, until check_trade_result or
+        # acheck_trade_result collects them (bounded: sweep-only callers never collect)
+        self._settled = OrderedDict()
         self.simulated_wins = 0
         self.simulated_losses = 0
+        # Guards active_trades, the slot arrays, _settled and the win/loss counters: settlements run
+        # in worker threads (asyncio.to_thread) and may race settle_expired
+        self._lock = threading.Lock()
         self.data_feed = data_feed_instance
+        # asset -> (quote, fetched_at); bursts of trades on one asset share a single fetch
+        self.quote_cache_ttl = quote_cache_ttl
+        self._quote_cache = {}
+        self._quote_locks = {}
+        self._quote_locks_guard = threading.Lock()
+        # Optional src.cache.SharedCache: workers on the same Redis share quote fetches too
+        self.shared_cache = shared_cache
         if self.data_feed is None:
             logger.error("BrokerAPI initialized WITHOUT a data_feed_instance. Price fetching will fail.")
         logger.info(f"Simulated BrokerAPI initialized. SSID (dummy): {ssid}. DataFeed connected: {self.data_feed is not None}")
@@ -29,6 +75,56 @@ class BrokerAPI:
         logger.info(f"Simulated BrokerAPI: subscribe_candles({asset}, {timeframe}) called.")
         pass
 
+    def _get_quote(self, asset: str, not_before: float = 0.0):
+        """
+        Return a quote for `asset`, reusing one fetched within the last `quote_cache_ttl` seconds
+        and no earlier than `not_before` (epoch seconds). Concurrent misses on the same asset wait
+        on a per-asset lock so only one of them calls the data feed.
+        """
+        entry = self._quote_cache.get(asset)
+        if entry is not None and self._quote_is_fresh(entry, not_before):
+            return entry[0]
+
+        with self._quote_locks_guard:
+            lock = self._quote_locks.setdefault(asset, threading.Lock())
+        with lock:
+            # Another caller may have fetched it while we waited for the lock
+            entry = self._quote_cache.get(asset)
+            if entry is not None and self._quote_is_fresh(entry, not_before):
+                return entry[0]
+            quote, fetched_at = self._fetch_quote(asset, not_before)
+            if quote:
+                self._quote_cache[asset] = (quote, fetched_at)
+            return quote
+
+    def _fetch_quote(self, asset: str, not_before: float):
+        """Fetch a quote from the data feed, via the shared cache (if any) so workers share one fetch."""
+        if self.shared_cache is None:
+            return self.data_feed.get_quote(asset), time.time()
+
+        key = f"quote:{asset}"
+        entry = self.shared_cache.get(key)
+        if entry is not None and self._quote_is_fresh(entry, not_before):
+            return entry[0], entry[1]
+        if not self.shared_cache.acquire(key, QUOTE_FETCH_LOCK_SECONDS):
+            # Another worker is fetching this asset; take its quote if it lands in time
+            entry = self.shared_cache.wait_for(key, QUOTE_FETCH_LOCK_SECONDS,
+                                               accept=lambda e: self._quote_is_fresh(e, not_before))
+            if entry is not None:
+                return entry[0], entry[1]
+        try:
+            quote = self.data_feed.get_quote(asset)
+            fetched_at = time.time()
+            if quote:
+                self.shared_cache.set(key, [quote, fetched_at], self.quote_cache_ttl)
+            return quote, fetched_at
+        finally:
+            self.shared_cache.release(key)
+
+    def _quote_is_fresh(self, entry, not_before: float) -> bool:
+        fetched_at = entry[1]
+        return fetched_at >= not_before and time.time() - fetched_at < self.quote_cache_ttl
+
     def place_trade(self, asset: str, amount: float, direction: str, duration_seconds: int) -> str:
         """
         Simulates placing a trade. Fetches current price as entry_price.
@@ -43,7 +139,7 @@ class BrokerAPI:
             return f"sim_trade_failure_no_data_feed_{uuid.uuid4()}" 
 
         try:
-            quote = self.data_feed.get_quote(asset)
+            quote = self._get_quote(asset)
             if quote and 'price' in quote and isinstance(quote['price'], (float, int)) and quote['price'] > 0:
                 entry_price = float(quote['price'])
             else:
@@ -53,15 +149,17 @@ class BrokerAPI:
             logger.error(f"Error fetching entry price for {asset} from data_feed: {e}. Trade will use a placeholder price.")
             entry_price = 1.0 # Fallback
 
-        self.active_trades[trade_id] = {
-            "asset": asset,
-            "amount": amount,
-            "direction": direction,
-            "duration_seconds": duration_seconds,
-            "open_time": time.time(),
-            "entry_price": entry_price
-        }
-        logger.info(f"Simulated trade placed: ID={trade_id}, Asset={asset}, Amount={amount}, Direction={direction}, Duration={duration_seconds}s, EntryPrice={entry_price or 'N/A'}")
+        with self._lock:
+            self.active_trades[trade_id] = {
+                "asset": asset,
+                "amount": amount,
+                "direction": direction,
+                "duration_seconds": duration_seconds
+            }
+            self._open_slot(trade_id, asset, entry_price, time.time() + duration_seconds,
+                            DIRECTION_SIGNS.get(direction, 0))
+        logger.info("Simulated trade placed: ID=%s, Asset=%s, Amount=%s, Direction=%s, Duration=%ss, EntryPrice=%s",
+                    trade_id, asset, amount, direction, duration_seconds, entry_price or 'N/A')
         return trade_id
 
     def check_trade_result(self, trade_id: str) -> bool:
@@ -69,76 +167,230 @@ class BrokerAPI:
         Checks a trade result after its duration by fetching the current price.
         Waits for the trade duration to elapse before checking.
         """
-        if trade_id not in self.active_trades:
-            logger.error(f"Simulated BrokerAPI: Trade ID {trade_id} not found for checking result.")
-            return False # Assume loss if ID is unknown or already processed
+        expiry_time = self._open_expiry(trade_id)
+        if expiry_time is None:
+            return self._take_settled(trade_id)
 
-        trade_info = self.active_trades[trade_id] # Keep it in active_trades until outcome is determined
-        
-        entry_price = trade_info["entry_price"]
-        direction = trade_info["direction"]
-        asset = trade_info["asset"]
-        open_time = trade_info["open_time"]
-        duration_seconds = trade_info["duration_seconds"]
+        wait_time = expiry_time - time.time()
+        if wait_time > 0:
+            logger.info("Waiting %.2f seconds for trade %s to expire...", wait_time, trade_id)
+            time.sleep(wait_time)
 
-        if entry_price is None or entry_price <= 0: # Check if entry price was valid
-            logger.error(f"Trade ID {trade_id} for {asset} has invalid entry price {entry_price}. Marking as loss.")
-            self.active_trades.pop(trade_id, None) # Remove from active trades
-            self.simulated_losses += 1
-            return False
+        return self._settle_trade(trade_id)
 
-        expiry_time = open_time + duration_seconds
-        current_time = time.time()
-        
-        wait_time = expiry_time - current_time
+    async def aplace_trade(self, asset: str, amount: float, direction: str, duration_seconds: int) -> str:
+        """
+        Async place_trade: the entry quote is fetched off the event loop and settlement is scheduled
+        for expiry right away, so the caller can keep trading while the trade runs.
+        """
+        trade_id = await asyncio.to_thread(self.place_trade, asset, amount, direction, duration_seconds)
+        if trade_id in self.active_trades:
+            self._schedule_settlement(trade_id)
+        return trade_id
+
+    async def acheck_trade_result(self, trade_id: str) -> bool:
+        """Async check_trade_result: awaits the trade's settlement without blocking the event loop."""
+        task = self.pending.get(trade_id) or self._schedule_settlement(trade_id)
+        try:
+            return await task
+        finally:
+            self.pending.pop(trade_id, None)
+
+    async def await_many(self, trade_ids) -> list:
+        """Await several trades concurrently; results are returned in the order of `trade_ids`."""
+        return list(await asyncio.gather(*(self.acheck_trade_result(trade_id) for trade_id in trade_ids)))
+
+    def _schedule_settlement(self, trade_id: str) -> asyncio.Task:
+        # Kept until acheck_trade_result has its result, so a result is not lost if it settles first
+        # and settle_expired knows to hand over trades it settles in the meantime
+        task = asyncio.ensure_future(self._settle_when_expired(trade_id))
+        self.pending[trade_id] = task
+        return task
+
+    async def _settle_when_expired(self, trade_id: str) -> bool:
+        expiry_time = self._open_expiry(trade_id)
+        if expiry_time is None:
+            return self._take_settled(trade_id)
+
+        wait_time = expiry_time - time.time()
         if wait_time > 0:
-            logger.info(f"Waiting {wait_time:.2f} seconds for trade {trade_id} ({asset}) to expire...")
-            time.sleep(wait_time)
-        
-        exit_price = None
+            logger.info("Scheduling result check for trade %s in %.2f seconds", trade_id, wait_time)
+            await asyncio.sleep(wait_time)
+
+        return await asyncio.to_thread(self._settle_trade, trade_id)
+
+    def _open_expiry(self, trade_id: str):
+        """Expiry (epoch seconds) of an open trade, or None if it is unknown or already settled."""
+        with self._lock:
+            i = self._id_to_slot.get(trade_id)
+            return None if i is None else float(self._expiry[i])
+
+    def _take_settled(self, trade_id: str) -> bool:
+        """Result of a trade settle_expired settled before it was checked (else a loss)."""
+        with self._lock:
+            if trade_id in self._settled:
+                return self._settled.pop(trade_id)
+        logger.error(f"Simulated BrokerAPI: Trade ID {trade_id} not found for checking result.")
+        return False # Assume loss if ID is unknown or already processed
+
+    def _settle_trade(self, trade_id: str) -> bool:
+        """Claim an expired trade, fetch its exit price and record its outcome."""
+        with self._lock:
+            claimed = self._claim_trade(trade_id)
+        if claimed is None:
+            # settle_expired got to it first
+            return self._take_settled(trade_id)
+        asset, direction, entry_price, expiry_time, dir_sign = claimed
+
+        if entry_price <= 0: # Check if entry price was valid
+            logger.error(f"Trade ID {trade_id} for {asset} has invalid entry price {entry_price}. Marking as loss.")
+            return self._record_outcome(False)
+
         if not self.data_feed:
             logger.error(f"Cannot check trade result for {trade_id} ({asset}): data_feed is not available for exit price.")
-            self.active_trades.pop(trade_id, None)
-            self.simulated_losses += 1 # Assume loss if we can't get exit price
-            return False
+            return self._record_outcome(False) # Assume loss if we can't get exit price
 
         try:
-            quote = self.data_feed.get_quote(asset)
+            # The exit price must be observed at or after expiry, never reused from before it
+            quote = self._get_quote(asset, not_before=expiry_time)
             if quote and 'price' in quote and isinstance(quote['price'], (float, int)) and quote['price'] > 0:
                 exit_price = float(quote['price'])
             else:
                 logger.warning(f"Could not get a valid exit price for {trade_id} ({asset}) from data_feed. Quote: {quote}. Marking as loss.")
-                self.active_trades.pop(trade_id, None)
-                self.simulated_losses += 1
-                return False
+                return self._record_outcome(False)
         except Exception as e:
             logger.error(f"Error fetching exit price for {trade_id} ({asset}) from data_feed: {e}. Marking as loss.")
-            self.active_trades.pop(trade_id, None)
-            self.simulated_losses += 1
-            return False
-
-        # Now remove from active_trades as we are about to determine outcome
-        self.active_trades.pop(trade_id, None) 
-
-        outcome_is_win = False
-        if direction == "CALL":
-            if exit_price > entry_price:
-                outcome_is_win = True
-        elif direction == "PUT":
-            if exit_price < entry_price:
-                outcome_is_win = True
-        
+            return self._record_outcome(False)
+
         # If exit_price == entry_price, it's a loss for binary options.
+        outcome_is_win = self._record_outcome((exit_price - entry_price) * dir_sign > 0.0)
+        logger.info("Simulated trade result for ID %s (%s, %s): %s. Entry: %.5f, Exit: %.5f",
+                    trade_id, asset, direction, "WIN" if outcome_is_win else "LOSS", entry_price, exit_price)
 
-        if outcome_is_win:
-            self.simulated_wins += 1
-            logger.info(f"Simulated trade result for ID {trade_id} ({asset}, {direction}): WIN. Entry: {entry_price:.5f}, Exit: {exit_price:.5f}")
-        else:
-            self.simulated_losses += 1
-            logger.info(f"Simulated trade result for ID {trade_id} ({asset}, {direction}): LOSS. Entry: {entry_price:.5f}, Exit: {exit_price:.5f}")
-            
         return outcome_is_win
 
+    def _record_outcome(self, won: bool) -> bool:
+        with self._lock:
+            self.simulated_wins += won
+            self.simulated_losses += not won
+        return won
+
+    def settle_expired(self, now=None, exit_prices=None) -> dict:
+        """
+        Settle every open trade that has expired by `now` (default: current time) in one vectorized pass.
+        `exit_prices` maps asset -> exit price; other assets are quoted once each through the data feed.
+        Trades without a valid exit price count as losses. Returns {trade_id: won}; a later
+        check_trade_result or acheck_trade_result on a settled trade returns the same result.
+        """
+        now = time.time() if now is None else now
+        exit_prices = exit_prices or {}
+        with self._lock:
+            n = self._n_open
+            ready = self._expiry[:n] <= now
+            if not ready.any():
+                return {}
+            asset_idx = self._asset_idx[:n][ready]
+            expiry = self._expiry[:n][ready]
+            # Each asset is priced no earlier than the latest expiry it settles
+            due = {int(idx): float(expiry[asset_idx == idx].max()) for idx in np.unique(asset_idx)}
+
+        # Quotes are fetched without holding the lock, one per asset
+        quoted = {}
+        for idx, not_before in due.items():
+            asset = self._assets[idx]
+            price = exit_prices.get(asset)
+            if price is None:
+                price = self._exit_price(asset, not_before)
+            quoted[idx] = (not_before, price if isinstance(price, (int, float)) and price > 0 else np.nan)
+
+        with self._lock:
+            # Re-select under the lock: trades settled meanwhile are gone, and only trades that
+            # expired by their asset's quote time are settled with it
+            n = self._n_open
+            cutoff = np.full(len(self._assets), -np.inf)
+            prices = np.full(len(self._assets), np.nan)
+            for idx, (not_before, price) in quoted.items():
+                cutoff[idx] = not_before
+                prices[idx] = price
+            asset_idx = self._asset_idx[:n]
+            ready = self._expiry[:n] <= cutoff[asset_idx]
+            if not ready.any():
+                return {}
+            # NaN exit prices compare False, i.e. a loss
+            wins = (prices[asset_idx[ready]] - self._entry[:n][ready]) * self._dir[:n][ready] > 0.0
+            settled_ids = self._slot_ids[:n][ready].tolist()
+
+            # Compact the still-open trades to the front of the arrays
+            keep = ~ready
+            m = int(keep.sum())
+            for column in self._columns():
+                column[:m] = column[:n][keep]
+            self._slot_ids[m:n] = None
+            self._n_open = m
+            self._id_to_slot = {trade_id: i for i, trade_id in enumerate(self._slot_ids[:m].tolist())}
+
+            results = dict(zip(settled_ids, wins.tolist()))
+            for trade_id, won in results.items():
+                self.active_trades.pop(trade_id, None)
+            self._settled.update(results)
+            while len(self._settled) > SETTLED_RESULTS_MAXSIZE:
+                self._settled.popitem(last=False)
+            n_wins = int(wins.sum())
+            self.simulated_wins += n_wins
+            self.simulated_losses += len(settled_ids) - n_wins
+        logger.info("Settled %d expired trades: %d wins, %d losses", len(settled_ids), n_wins, len(settled_ids) - n_wins)
+        return results
+
+    def _exit_price(self, asset: str, not_before: float):
+        if not self.data_feed:
+            return None
+        try:
+            quote = self._get_quote(asset, not_before=not_before)
+        except Exception as e:
+            logger.error(f"Error fetching exit price for {asset} from data_feed: {e}. Marking its trades as losses.")
+            return None
+        return quote.get('price') if quote else None
+
+    def _columns(self):
+        return self._entry, self._expiry, self._dir, self._asset_idx, self._slot_ids
+
+    def _open_slot(self, trade_id: str, asset: str, entry_price: float, expiry_time: float, dir_sign: int):
+        """Append an open trade to the arrays (caller holds _lock)."""
+        if self._n_open == len(self._entry):
+            self._entry, self._expiry, self._dir, self._asset_idx, self._slot_ids = (
+                np.concatenate([column, np.empty_like(column)]) for column in self._columns()
+            )
+        if asset not in self._asset_codes:
+            self._asset_codes[asset] = len(self._assets)
+            self._assets.append(asset)
+        i = self._n_open
+        self._entry[i] = entry_price
+        self._expiry[i] = expiry_time
+        self._dir[i] = dir_sign
+        self._asset_idx[i] = self._asset_codes[asset]
+        self._slot_ids[i] = trade_id
+        self._id_to_slot[trade_id] = i
+        self._n_open += 1
+
+    def _claim_trade(self, trade_id: str):
+        """
+        Remove an open trade (caller holds _lock), freeing its slot by moving the last open trade into it.
+        Returns (asset, direction, entry_price, expiry_time, dir_sign), or None if it is no longer open.
+        """
+        i = self._id_to_slot.pop(trade_id, None)
+        if i is None:
+            return None
+        info = self.active_trades.pop(trade_id)
+        claimed = (info["asset"], info["direction"], float(self._entry[i]), float(self._expiry[i]), int(self._dir[i]))
+        last = self._n_open - 1
+        if i != last:
+            for column in self._columns():
+                column[i] = column[last]
+            self._id_to_slot[self._slot_ids[i]] = i
+        self._slot_ids[last] = None
+        self._n_open = last
+        return claimed
+
     def get_simulated_stats(self):
         return {
             "wins": self.simulated_wins,
@@ -1,20 +1,100 @@
+import atexit
+import weakref
+import threading
+import contextlib
+import itertools
+from datetime import datetime, timezone
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+# Number of most recent trades kept in memory (and sent to the LLM as context)
+DEFAULT_HISTORY_WINDOW = 50
+# Trade rows buffered before they are written in one commit
+DEFAULT_FLUSH_THRESHOLD = 32
+# Rows per INSERT when bulk_load cannot use COPY
+BULK_LOAD_BATCH_SIZE = 1000
+# int8 codes for the decision column of the outcome ring
+DECISION_CODES = {'CALL': 0, 'PUT': 1}
+NO_DECISION_CODE = 2
+# A session only ever holds one connection; keep a few warm for event logging, never open more
+DB_POOL_SIZE = 4
+
+def _engine_options(database_url):
+    """create_engine kwargs: a small pre-pinged pool for server databases, defaults for SQLite."""
+    from sqlalchemy.engine import make_url
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    options = {'pool_size': DB_POOL_SIZE, 'max_overflow': 0, 'pool_pre_ping': True}
+    if url.get_driver_name() == 'psycopg':
+        # No server-side prepared statements, so the URL can point at PgBouncer in transaction mode
+        options['connect_args'] = {'prepare_threshold': None}
+    return options
+
+# One engine (and schema check) per database URL per process, shared by every FeedbackLoop
+_engines = {}
+_sessionmakers = {}
+_engine_lock = threading.Lock()
+
+def _get_sessionmaker(database_url):
+    """Return the process-wide sessionmaker for `database_url`, creating the engine and tables on first use."""
+    with _engine_lock:
+        if database_url not in _sessionmakers:
+            from sqlalchemy import create_engine
+            from sqlalchemy.orm import sessionmaker
+            from .models import Base, Trade
+
+            engine = create_engine(database_url, **_engine_options(database_url))
+            Base.metadata.create_all(engine)
+            # create_all skips tables that already exist, so add indexes introduced since separately
+            for index in Trade.__table__.indexes:
+                index.create(engine, checkfirst=True)
+            _engines[database_url] = engine
+            _sessionmakers[database_url] = sessionmaker(bind=engine)
+        return _sessionmakers[database_url]
+
+# Loops with a database session; one exit hook flushes them all without keeping any of them alive
+_open_loops = weakref.WeakSet()
+
+@atexit.register
+def _flush_open_loops():
+    for loop in list(_open_loops):
+        loop.flush()
+
+@dataclass(slots=True, frozen=True)
+class TradeEntry:
+    """One in-memory trade history entry; `outcome` is None for a signal that was never settled."""
+    decision: str
+    outcome: bool | None = None
+    signal: bool = False
+
 class FeedbackLoop:
-    def __init__(self, database_url=None):
+    def __init__(self, database_url=None, history_window=DEFAULT_HISTORY_WINDOW,
+                 flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        if history_window < 1:
+            raise ValueError(f"history_window must be at least 1, got {history_window}")
         # Optional database URL for logging or persistence
         self.database_url = database_url
-        self.trade_history = []
+        # Bounded: older trades drop off, lifetime totals live in performance_metrics
+        self.trade_history = deque(maxlen=history_window)
+        # Same window as parallel arrays (a ring written at _head) for vectorized analysis
+        self._outcomes = np.zeros(history_window, dtype=bool)
+        self._decisions = np.full(history_window, NO_DECISION_CODE, dtype=np.int8)
+        self._head = 0
+        self._count = 0
         # Setup database connection if provided
         if database_url:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from .models import Base, Trade, SystemEvent
-
-            self.engine = create_engine(database_url)
-            Base.metadata.create_all(self.engine)
-            Session = sessionmaker(bind=self.engine)
-            self.session = Session()
+            self.session = _get_sessionmaker(database_url)()
+            self.engine = _engines[database_url]
         else:
             self.session = None
+        # Trade rows (plain dicts) waiting to be persisted; written in one INSERT by flush()
+        self._pending_trades = []
+        self._flush_threshold = flush_threshold
+        if self.session:
+            _open_loops.add(self)
 
         self.performance_metrics = {
             'total_trades': 0,
@@ -23,33 +103,133 @@ class FeedbackLoop:
             'win_rate': 0.0
         }
         self.strategy_adjusted = False
+        # win_rate is recomputed lazily, only when read after new trades
+        self._win_rate_dirty = False
+        # Running wins - losses, so session PnL needs no recomputation
+        self._net_wins = 0
+        # Session-end limits in net-win units, recomputed only when should_end_session's arguments change
+        self._threshold_args = None
+        self._end_thresholds = (float('inf'), float('-inf'))
 
     def record_trade(self, decision, outcome):
-        self.trade_history.append({'decision': decision, 'outcome': outcome})
-        self.performance_metrics['total_trades'] += 1
-        if outcome == 'win':
-            self.performance_metrics['wins'] += 1
-        else:
-            self.performance_metrics['losses'] += 1
-        self.update_win_rate()
+        """Legacy alias of record_trade_outcome accepting 'win'/'loss' strings."""
+        self.record_trade_outcome(decision, outcome == 'win' if isinstance(outcome, str) else bool(outcome))
 
     def record_trade_outcome(self, decision, outcome):
         """Record a trade outcome where outcome is a boolean indicating win (True) or loss (False)."""
         # Append to history as boolean
-        self.trade_history.append({'decision': decision, 'outcome': outcome})
+        self.trade_history.append(TradeEntry(decision, bool(outcome)))
+        self._push_outcome(decision, bool(outcome))
         # Update performance metrics
+        self._count_outcome(bool(outcome))
+        # Buffer the trade for persistence if session available; stamped now, not at flush time
+        if self.session:
+            self._pending_trades.append(
+                {'decision': decision, 'outcome': bool(outcome), 'timestamp': datetime.now(timezone.utc)}
+            )
+            if len(self._pending_trades) >= self._flush_threshold:
+                self.flush()
+
+    def flush(self):
+        """Write buffered trades to the database in a single multi-row INSERT and commit."""
+        if not self.session or not self._pending_trades:
+            return
+        from .models import Trade
+        # Core insert: no ORM unit-of-work bookkeeping for rows we never read back
+        with self._pipeline():
+            self.session.execute(Trade.__table__.insert(), self._pending_trades)
+        self.session.commit()
+        self._pending_trades.clear()
+
+    def close(self):
+        """Flush buffered trades and release the database session; the loop stays usable in memory."""
+        _open_loops.discard(self)
+        if self.session:
+            self.flush()
+            self.session.close()
+            self.session = None
+
+    def record_signal(self, decision):
+        """Record a signal-only decision (no trade placed, so no outcome and no metrics update)."""
+        self.trade_history.append(TradeEntry(decision, signal=True))
+
+    def bulk_load(self, trades):
+        """
+        Persist a large iterable of (decision, outcome) or (decision, outcome, timestamp) tuples,
+        e.g. at the end of a backtest. Streams them with COPY on psycopg 3 connections and falls
+        back to batched multi-row INSERTs elsewhere. In-memory history and metrics are not touched.
+        Returns the number of rows written.
+        """
+        if not self.session:
+            return 0
+        # Keep buffered live trades ahead of the bulk rows
+        self.flush()
+        rows = (self._trade_row(trade) for trade in trades)
+        if self.engine.dialect.driver == 'psycopg':
+            count = self._copy_trades(rows)
+        else:
+            from .models import Trade
+            insert = Trade.__table__.insert()
+            count = 0
+            while batch := list(itertools.islice(rows, BULK_LOAD_BATCH_SIZE)):
+                self.session.execute(insert, [
+                    {'decision': decision, 'outcome': outcome, 'timestamp': ts} for decision, outcome, ts in batch
+                ])
+                count += len(batch)
+        self.session.commit()
+        return count
+
+    @staticmethod
+    def _trade_row(trade):
+        decision, outcome, *rest = trade
+        return decision, bool(outcome), (rest[0] if rest and rest[0] else datetime.now(timezone.utc))
+
+    def _copy_trades(self, rows):
+        """COPY rows into trades on the session's own connection, inside its transaction."""
+        cursor = self.session.connection().connection.driver_connection.cursor()
+        count = 0
+        with cursor, cursor.copy("COPY trades (decision, outcome, timestamp) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+        return count
+
+    def _pipeline(self):
+        """libpq pipeline mode on psycopg 3 connections, so BEGIN and the INSERT share a round-trip."""
+        if self.engine.dialect.driver != 'psycopg':
+            return contextlib.nullcontext()
+        return self.session.connection().connection.driver_connection.pipeline()
+
+    def _push_outcome(self, decision, won: bool):
+        capacity = len(self._outcomes)
+        self._outcomes[self._head] = won
+        self._decisions[self._head] = DECISION_CODES.get(decision, NO_DECISION_CODE)
+        self._head = (self._head + 1) % capacity
+        self._count = min(self._count + 1, capacity)
+
+    def _window_arrays(self):
+        """(outcomes, decisions) for the retained trades, oldest first."""
+        start = len(self._outcomes) - self._count
+        return (np.roll(self._outcomes, -self._head)[start:],
+                np.roll(self._decisions, -self._head)[start:])
+
+    def _count_outcome(self, won: bool):
         self.performance_metrics['total_trades'] += 1
-        if outcome:
+        if won:
             self.performance_metrics['wins'] += 1
+            self._net_wins += 1
         else:
             self.performance_metrics['losses'] += 1
-        self.update_win_rate()
-        # Persist trade to database if session available
-        if self.session:
-            from .models import Trade
-            trade = Trade(decision=decision, outcome=outcome)
-            self.session.add(trade)
-            self.session.commit()
+            self._net_wins -= 1
+        self._win_rate_dirty = True
+
+    def recent_history(self, n: int | None = None) -> list:
+        """Return the last `n` trades (all retained trades if None) as a list, oldest first."""
+        if n is None or n >= len(self.trade_history):
+            return list(self.trade_history)
+        if n <= 0:
+            return []
+        return list(self.trade_history)[-n:]
 
     def record_system_event(self, event_type: str, symbol: str | None = None, details: str | None = None):
         """Record a system event, such as a pair switch due to inactivity."""
@@ -68,6 +248,8 @@ class FeedbackLoop:
 
     def calculate_win_rate(self):
         """Return the current win rate."""
+        if self._win_rate_dirty:
+            self.update_win_rate()
         return self.performance_metrics.get('win_rate', 0.0)
 
     def update_win_rate(self):
@@ -75,13 +257,35 @@ class FeedbackLoop:
             self.performance_metrics['win_rate'] = (
                 self.performance_metrics['wins'] / self.performance_metrics['total_trades']
             )
+        self._win_rate_dirty = False
 
     def get_performance_metrics(self):
+        if self._win_rate_dirty:
+            self.update_win_rate()
         return self.performance_metrics
 
     def analyze_trade_history(self):
-        # Placeholder for future analysis logic
-        pass
+        """
+        Statistics over the trades in the history window: win rate, per-direction accuracy
+        (None when no trades in that direction) and the current streak (+wins / -losses).
+        """
+        if self._count == 0:
+            return {'trades': 0, 'win_rate': 0.0, 'call_accuracy': None, 'put_accuracy': None, 'streak': 0}
+        outcomes, decisions = self._window_arrays()
+
+        def accuracy(code):
+            mask = decisions == code
+            return float(outcomes[mask].mean()) if mask.any() else None
+
+        breaks = np.flatnonzero(outcomes != outcomes[-1])
+        streak = self._count - (breaks[-1] + 1 if breaks.size else 0)
+        return {
+            'trades': self._count,
+            'win_rate': float(outcomes.mean()),
+            'call_accuracy': accuracy(DECISION_CODES['CALL']),
+            'put_accuracy': accuracy(DECISION_CODES['PUT']),
+            'streak': int(streak if outcomes[-1] else -streak),
+        }
 
     def adjust_strategy(self):
         # Simple flag to indicate strategy was adjusted
@@ -93,10 +297,21 @@ class FeedbackLoop:
         Determine if session should end based on PnL reaching profit target or loss limit.
         PnL percent = (wins - losses) * trade_amount / initial_balance * 100
         """
-        wins = self.performance_metrics.get('wins', 0)
-        losses = self.performance_metrics.get('losses', 0)
-        pnl = (wins - losses) * trade_amount
-        pnl_pct = (pnl / initial_balance) * 100 if initial_balance else 0.0
-        if pnl_pct >= profit_target_pct or pnl_pct <= -loss_limit_pct:
-            return True
-        return False
\ No newline at end of file
+        # Session boundary: make sure every recorded trade is on disk
+        self.flush()
+        args = (initial_balance, trade_amount, profit_target_pct, loss_limit_pct)
+        if args != self._threshold_args:
+            self._threshold_args = args
+            self._end_thresholds = self._session_end_thresholds(*args)
+        win_units, loss_units = self._end_thresholds
+        return self._net_wins >= win_units or self._net_wins <= loss_units
+
+    @staticmethod
+    def _session_end_thresholds(initial_balance, trade_amount, profit_target_pct, loss_limit_pct):
+        """The profit/loss limits expressed as (wins - losses) counts."""
+        if not initial_balance or not trade_amount:
+            # PnL percent is always 0 here: the limits are either already met or unreachable
+            inf = float('inf')
+            return (-inf if profit_target_pct <= 0 else inf, inf if loss_limit_pct <= 0 else -inf)
+        units = 100 * trade_amount / initial_balance
+        return profit_target_pct / units, -loss_limit_pct / units
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, func, text
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -10,7 +10,15 @@ class Trade(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     decision = Column(String, nullable=False)
     outcome = Column(Boolean, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Rows are appended in time order, so a BRIN index stays tiny on PostgreSQL (plain btree elsewhere)
+        Index('ix_trades_timestamp_brin', 'timestamp', postgresql_using='brin'),
+        # Wins only, for rolling win-rate / streak queries over a time window
+        Index('ix_trades_wins_ts', 'timestamp',
+              postgresql_where=text('outcome = true'), sqlite_where=text('outcome = 1')),
+    )
 
 class SystemEvent(Base):
     __tablename__ = 'system_events'
@@ -3,12 +3,14 @@ import logging
 import datetime
 import argparse # Added for CLI arguments
 import re # Added for parsing payouts
+from concurrent.futures import ThreadPoolExecutor
 from .data.data_feed import DataFeed
 from .data.otc_feed import OTCFeed
-from .decision.llm_engine_temporal import TemporalLLMEngine
+from .decision.llm_engine_temporal import TemporalLLMEngine, use_orjson_request_encoder
 from .config import Config
 from src.execution.broker_api import BrokerAPI
 from src.feedback.feedback_loop import FeedbackLoop
+from src.cache import get_shared_cache
 # Alias legacy LLMEngine name for backward compatibility and tests
 LLMEngine = TemporalLLMEngine
 
@@ -66,18 +68,56 @@ def get_payout_data_from_html(html_content: str) -> dict[str, int]:
         logging.info(f"Parsed payouts for {len(payouts)} assets: {payouts}")
     return payouts
 
+def _gather_market_inputs(io_pool, data_feed, otc_feed, symbol, interval):
+    """Fetch the spot quote and OTC candles concurrently; the two feeds are independent blocking calls."""
+    quote = io_pool.submit(data_feed.get_quote, symbol)
+    candles = io_pool.submit(otc_feed.get_otc_candles, symbol, interval)
+    return quote.result(), candles.result()
+
+def _wait_for_market_change(cfg, data_feed, symbol, spot_quote):
+    """Block until `symbol` moves past the configured threshold or the idle timeout passes."""
+    max_idle = getattr(cfg, 'max_idle_seconds', 60)
+    reference_price = spot_quote.get('price') if isinstance(spot_quote, dict) else None
+    wait = getattr(data_feed, 'wait_for_price_change', None)
+    if wait is None or not isinstance(reference_price, (int, float)):
+        time.sleep(max_idle)
+        return
+    wait(symbol, reference_price, getattr(cfg, 'price_change_threshold_pct', 0.01), max_idle,
+         poll_interval=getattr(cfg, 'price_poll_interval_seconds', 15.0))
+
+def _decision_cache_key(symbol, spot_quote, recent_trades):
+    """Key identifying LLM inputs that would produce the same decision, or None if the quote has no price."""
+    price = spot_quote.get('price') if isinstance(spot_quote, dict) else None
+    if not isinstance(price, (int, float)):
+        return None
+    return (symbol, round(price, 5), tuple(t.outcome for t in recent_trades))
+
 def run_session(cfg, data_feed, otc_feed, engine, broker_api, feedback_loop, symbols_list, initial_symbol_idx, max_iterations=None, **kwargs):
     """
     Run the trading loop, cycling through symbols if one becomes inactive.
     Optionally stop after max_iterations or session-end conditions.
     Returns the trade history.
     """
+    # Two workers for the per-iteration quote + OTC fetch, reused for the whole session and
+    # released however the loop ends; a fetch still in flight is not waited for
+    io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="market-io")
+    try:
+        return _run_session_loop(io_pool, cfg, data_feed, otc_feed, engine, broker_api, feedback_loop,
+                                 symbols_list, initial_symbol_idx, max_iterations)
+    finally:
+        io_pool.shutdown(wait=False, cancel_futures=True)
+
+def _run_session_loop(io_pool, cfg, data_feed, otc_feed, engine, broker_api, feedback_loop, symbols_list,
+                      initial_symbol_idx, max_iterations):
+    """The body of run_session; `io_pool` fetches the market inputs of each iteration."""
     iteration = 0
     current_symbol_idx = initial_symbol_idx
     # symbol will be set at the start of the loop based on current_symbol_idx
     no_trade_consecutive_count = 0
     pair_blacklist = {}  # Stores symbol: unblacklist_time
     consecutive_system_switches = 0  # Tracks consecutive switches due to inactivity
+    decision_cache_ttl = getattr(cfg, 'decision_cache_ttl_seconds', 0)
+    decision_cache = {}  # (symbol, price, recent outcomes): (decision, expires_at)
 
     while True:
         # Update symbol based on current_symbol_idx (in case it changed in the previous iteration)
@@ -116,21 +156,36 @@ def run_session(cfg, data_feed, otc_feed, engine, broker_api, feedback_loop, sym
                 # If after waiting it's still an issue, the loop will repeat this check.
 
         # 1) Fetch API data
-        spot_quote  = data_feed.get_quote(symbol)
-        otc_candle  = otc_feed.get_otc_candles(symbol, cfg.otc_interval)
+        spot_quote, otc_candle = _gather_market_inputs(io_pool, data_feed, otc_feed, symbol, cfg.otc_interval)
 
-        # Log the current trade history before sending to LLM
-        logging.debug(f"MAIN_LOOP: Current feedback_loop.trade_history: {feedback_loop.trade_history}")
+        # Only the bounded recent window is sent to the LLM
+        recent_trades = feedback_loop.recent_history()
 
-        # 2) Ask LLM for a decision
-        # Call get_decision, supporting both the new temporal signature and legacy signature
-        try:
-            decision = engine.get_decision(symbol, spot_quote, feedback_loop.trade_history)
-        except TypeError:
-            decision = engine.get_decision(spot_quote, feedback_loop.trade_history)
-        logging.info(f"LLM decision: {decision}") # Added log to see the decision before trade execution
+        # Log the current trade history before sending to LLM
+        logging.debug(f"MAIN_LOOP: Current feedback_loop.trade_history: {recent_trades}")
+
+        # 2) Ask LLM for a decision, unless the same inputs were answered moments ago
+        cache_key = _decision_cache_key(symbol, spot_quote, recent_trades) if decision_cache_ttl > 0 else None
+        cached = decision_cache.get(cache_key) if cache_key is not None else None
+        decision_from_cache = bool(cached) and cached[1] > time.time()
+        if decision_from_cache:
+            decision = cached[0]
+            logging.info(f"LLM decision (cached, inputs unchanged): {decision}")
+        else:
+            # Call get_decision, supporting both the new temporal signature and legacy signature
+            try:
+                decision = engine.get_decision(symbol, spot_quote, recent_trades)
+            except TypeError:
+                decision = engine.get_decision(spot_quote, recent_trades)
+            logging.info(f"LLM decision: {decision}") # Added log to see the decision before trade execution
+            if cache_key is not None:
+                # Only the latest answer per symbol is worth keeping
+                for key in [k for k in decision_cache if k[0] == symbol]:
+                    del decision_cache[key]
+                decision_cache[cache_key] = (decision, time.time() + decision_cache_ttl)
 
         # 3) Execute trade if valid CALL/PUT
+        trade_settled = False  # True once a trade has run to expiry in this iteration
         if decision in ("CALL", "PUT"):  # Trade or signal decision
             if cfg.enable_demo_mode:
                 # In demo/signal-only mode, record the signal without executing live trades
@@ -142,19 +197,26 @@ def run_session(cfg, data_feed, otc_feed, engine, broker_api, feedback_loop, sym
                     trade_id = broker_api.place_trade(symbol, cfg.trade_amount, decision, cfg.otc_interval) 
                     outcome = broker_api.check_trade_result(trade_id)
                     feedback_loop.record_trade_outcome(decision, outcome)
+                    trade_settled = True
                 else:  # For normal signal-only operation
-                    feedback_loop.trade_history.append({'decision': decision, 'signal': True})
+                    feedback_loop.record_signal(decision)
             else:
                 logging.info(f"Executing trade based on LLM decision: {decision} on {symbol}")
                 trade_id = broker_api.place_trade(symbol, cfg.trade_amount, decision, cfg.otc_interval)
                 if trade_id:  # Ensure trade_id is not None (e.g. if broker API failed)
+                    # Deliberately blocking until expiry: the next decision and the session-end check
+                    # need this outcome. BrokerAPI's async API serves callers with concurrent trades.
                     outcome = broker_api.check_trade_result(trade_id)
                     feedback_loop.record_trade_outcome(decision, outcome)
+                    trade_settled = True
                 else:
                     logging.error("Failed to place trade, broker_api.place_trade returned None.")
             no_trade_consecutive_count = 0 # Reset counter on any trade action
             consecutive_system_switches = 0 # Reset system switch counter on successful trade/signal
             logging.debug("Reset consecutive_system_switches due to CALL/PUT.")
+        elif decision == "NO TRADE" and decision_from_cache:
+            # A repeat of an answer already counted, not a fresh judgement on new inputs
+            logging.info("Cached NO TRADE for unchanged inputs. No trade will be placed.")
         elif decision == "NO TRADE":
             logging.info("LLM decided NO TRADE. No trade will be placed.")
             no_trade_consecutive_count += 1
@@ -249,13 +311,13 @@ def run_session(cfg, data_feed, otc_feed, engine, broker_api, feedback_loop, sym
             logging.info(f"Reached max_iterations ({max_iterations}). Exiting session.") # Added log
             break
 
-        # Wait for a defined period before the next iteration to reduce LLM calls
-        logging.debug("MAIN_LOOP: Waiting before next iteration...")
-        if max_iterations is None:
-            logging.debug("Sleeping for 60 seconds...")
-            time.sleep(60)  # Add a 60-second delay only for live sessions
+        # Live sessions only: after a trade its expiry has already been waited out, so decide again
+        # right away; otherwise idle until the price moves enough to matter (or max_idle_seconds)
+        if max_iterations is None and not trade_settled:
+            logging.debug("MAIN_LOOP: Waiting for a price change before next iteration...")
+            _wait_for_market_change(cfg, data_feed, symbol, spot_quote)
 
-    return feedback_loop.trade_history
+    return list(feedback_loop.trade_history)
 
 
 def main(cfg_override=None): # Modified to accept potential overrides
@@ -291,13 +353,18 @@ def main(cfg_override=None): # Modified to accept potential overrides
     logging.info("Attempting to parse asset payouts from PocketOption data.")
     payout_data = get_payout_data_from_html(POCKET_OPTION_ASSETS_HTML_CONTENT)
 
+    if cfg.orjson_requests and not use_orjson_request_encoder():
+        logging.warning("ORJSON_REQUESTS is set but orjson encoding is unavailable; using the SDK encoder.")
+    shared_cache  = get_shared_cache(cfg.redis_url) # None unless REDIS_URL is set
     data_feed     = DataFeed(api_key=cfg.polygon_api_key)
     otc_feed      = OTCFeed()
     # Initialize temporal LLM engine with historical context
-    engine        = LLMEngine(api_key=cfg.openai_api_key, model=cfg.llm_model) # Pass model
+    engine        = LLMEngine(api_key=cfg.openai_api_key, model=cfg.llm_model, # Pass model
+                              shared_cache=shared_cache)
     engine.initialize_historical_collector(data_feed, lookback_periods=20, timeframe_minutes=5)
-    broker_api    = BrokerAPI(ssid=cfg.po_ssid, data_feed_instance=data_feed) # Pass data_feed here
-    feedback_loop = FeedbackLoop(database_url=cfg.database_url)
+    broker_api    = BrokerAPI(ssid=cfg.po_ssid, data_feed_instance=data_feed, # Pass data_feed here
+                              quote_cache_ttl=cfg.quote_cache_ttl_seconds, shared_cache=shared_cache)
+    feedback_loop = FeedbackLoop(database_url=cfg.database_url, history_window=cfg.history_window)
     
     # Retrieve OTC symbols from feed
     raw_symbols = otc_feed.get_otc_symbols()
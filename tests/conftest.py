@@ -15,3 +15,166 @@ mock.patch = _patched_patch
 
 # Expose patch at module level for pytest
 from unittest.mock import patch
+
+import copy
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import MagicMock
+
+import src.main
+
+# Names src.main wires together in main(); replaced wholesale by the main_mocks fixture
+# (run_session is patched separately, once per module, by patch_run_session)
+MAIN_PATCH_NAMES = ('DataFeed', 'OTCFeed', 'LLMEngine', 'BrokerAPI', 'FeedbackLoop', 'Config')
+
+class _EngineSpec:
+    """The LLMEngine surface main() touches."""
+    def initialize_historical_collector(self, data_feed, lookback_periods, timeframe_minutes): ...
+    def select_pair(self, symbols, data_feed): ...
+
+@pytest.fixture(scope="session")
+def config_template():
+    """Config class stand-in whose instances carry dummy credentials; configured once per session."""
+    m = MagicMock(name='Config')
+    m.return_value.openai_api_key = "test_key"
+    m.return_value.po_ssid = "test_ssid"
+    m.return_value.polygon_api_key = "test_polygon"
+    m.return_value.log_level = "INFO"
+    m.return_value.orjson_requests = False
+    return m
+
+@pytest.fixture(scope="session")
+def main_mock_prototypes(config_template):
+    """MagicMock stand-ins for the src.main dependencies, built and configured once per session."""
+    mocks = {name: MagicMock(name=name) for name in MAIN_PATCH_NAMES if name != 'Config'}
+    mocks['Config'] = config_template
+    # Instances main() actually calls into get narrow spec_sets: unexpected attribute access fails loudly
+    mocks['OTCFeed'].return_value = MagicMock(spec_set=['get_otc_symbols'])
+    mocks['OTCFeed'].return_value.get_otc_symbols.return_value = ["EURUSD", "GBPUSD", "USDJPY"]
+    mocks['engine_instance'] = mocks['LLMEngine'].return_value = MagicMock(spec_set=_EngineSpec)
+    mocks['engine_instance'].select_pair.return_value = "EURUSD"
+    return mocks
+
+@pytest.fixture(scope="module")
+def patch_run_session():
+    """Replace src.main.run_session with one MagicMock for a whole module (apply via pytestmark)."""
+    with pytest.MonkeyPatch.context() as mp:
+        mock = MagicMock(name='run_session')
+        mp.setattr(src.main, 'run_session', mock)
+        yield mock
+
+@pytest.fixture
+def run_session_mock(patch_run_session):
+    """The module's run_session mock with the previous test's calls cleared."""
+    patch_run_session.reset_mock()
+    return patch_run_session
+
+@pytest.fixture
+def main_mocks(main_mock_prototypes, run_session_mock, monkeypatch):
+    """
+    Install the prototype mocks on src.main for one test; monkeypatch restores the originals.
+    Call history is cleared with reset_mock() (configured return values survive);
+    a shallow copy would share the child mocks anyway.
+    """
+    for name in MAIN_PATCH_NAMES:
+        mock = main_mock_prototypes[name]
+        mock.reset_mock()
+        monkeypatch.setattr(src.main, name, mock)
+    return dict(main_mock_prototypes, run_session=run_session_mock)
+
+# Stand-ins for run_session's collaborators (see test_main_run_session.py)
+class DummyFeed:
+    __slots__ = ()
+    def get_quote(self, symbol):
+        return {'price': 100.0}
+
+class DummyOTC:
+    __slots__ = ()
+    def get_otc_candles(self, symbol, interval):
+        return {'candle': 'dummy'}
+
+class DummyEngine:
+    __slots__ = ('_it',)
+    def __init__(self, decisions):
+        self._it = iter(decisions)
+    def get_decision(self, market_data, recent_trades):
+        # Return next decision or NO TRADE when exhausted
+        return next(self._it, 'NO TRADE')
+    def remaining(self):
+        """Decisions not yet handed out (consumes them)."""
+        return list(self._it)
+
+class DummyBroker:
+    __slots__ = ('_it', '_ids')
+    def __init__(self, outcomes):
+        self._it = iter(outcomes)
+        self._ids = itertools.count()
+    def place_trade(self, asset, amount, direction, duration):
+        return f"trade{next(self._ids)}"
+    def check_trade_result(self, trade_id):
+        # Return next outcome, a loss when exhausted
+        return next(self._it, False)
+    def subscribe_candles(self, asset, timeframe):
+        pass
+    def disconnect(self):
+        pass
+
+@pytest.fixture(scope="session")
+def dummy_feed():
+    return DummyFeed()
+
+@pytest.fixture(scope="session")
+def dummy_otc():
+    return DummyOTC()
+
+@pytest.fixture(scope="session")
+def make_engine():
+    """DummyEngine class: call with the decisions to return, in order."""
+    return DummyEngine
+
+@pytest.fixture(scope="session")
+def make_broker():
+    """DummyBroker class: call with the trade outcomes to return, in order."""
+    return DummyBroker
+
+@pytest.fixture(scope="session")
+def cfg():
+    """Read-only run_session config; tests needing other values build their own SimpleNamespace."""
+    return SimpleNamespace(
+        otc_interval=1,
+        trade_amount=10,
+        initial_balance=100,
+        profit_target_pct=5,
+        loss_limit_pct=2,
+        enable_demo_mode=True,  # Signal-only mode
+        max_consecutive_no_trade=5,
+        pair_blacklist_duration_seconds=300,
+        max_consecutive_system_switches=3,
+        system_cool_down_duration_seconds=60,
+    )
+
+@pytest.fixture(scope="session")
+def feedback_module():
+    """src.feedback.feedback_loop, resolved (or the dependent tests skipped) once per session."""
+    return pytest.importorskip('src.feedback.feedback_loop')
+
+@pytest.fixture(scope="session")
+def feedback_loop_prototype(feedback_module):
+    """An in-memory FeedbackLoop (no database) built once per session."""
+    return feedback_module.FeedbackLoop()
+
+@pytest.fixture
+def feedback_loop(request):
+    """
+    A fresh FeedbackLoop per test, deep-copied from the session prototype.
+    Parametrize indirectly with "mock" for runs that never record a trade: the loop is then a
+    MagicMock that never ends the session, and the real module is not needed at all.
+    """
+    if getattr(request, 'param', 'real') == 'mock':
+        mock = MagicMock(name='FeedbackLoop')
+        mock.should_end_session.return_value = False
+        mock.recent_history.return_value = []
+        return mock
+    return copy.deepcopy(request.getfixturevalue('feedback_loop_prototype'))
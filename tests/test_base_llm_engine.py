@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+from types import SimpleNamespace
+from src.decision.base_llm_engine import BaseLLMEngine, _contains_decision
+from src.decision.circuit_breaker import CircuitBreaker
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class _FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield _chunk(piece)
+
+    def close(self):
+        self.closed = True
+
+def test_get_decision_closes_stream_once_decision_seen():
+    engine = BaseLLMEngine(api_key="test")
+    stream = _FakeStream(["CA", "LL\n", "because", " momentum"])
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.return_value = stream
+
+    assert engine.get_decision({"price": 1.0}, []) == "CALL"
+    assert stream.consumed == 2
+    assert stream.closed
+    assert engine.client.chat.completions.create.call_args.kwargs["stream"] is True
+
+def test_retries_reuse_idempotency_key(monkeypatch):
+    monkeypatch.setattr("src.decision.base_llm_engine.time.sleep", lambda _: None)
+    engine = BaseLLMEngine(api_key="test")
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.side_effect = [Exception("lost response"), _FakeStream(["PUT"])]
+
+    assert engine.get_decision({"price": 1.0}, []) == "PUT"
+    keys = [c.kwargs["extra_headers"]["Idempotency-Key"] for c in engine.client.chat.completions.create.call_args_list]
+    assert len(keys) == 2 and keys[0] == keys[1]
+
+def test_empty_responses_trip_the_breaker(monkeypatch):
+    breaker = CircuitBreaker(fail_threshold=2, reset_timeout=30)
+    monkeypatch.setattr("src.decision.base_llm_engine._breaker", breaker)
+    engine = BaseLLMEngine(api_key="test")
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.side_effect = lambda **_: _FakeStream([])
+
+    assert engine.get_decision({"price": 1.0}, []) == "NO TRADE"
+    assert engine.get_decision({"price": 1.0}, []) == "NO TRADE"
+    assert breaker.is_open()
+    assert engine.client.chat.completions.create.call_count == 2
+
+def test_decision_words_match_whole_words_on_complete_lines():
+    assert not _contains_decision("The INPUT data shows a RECALL")
+    assert not _contains_decision("CALL")  # the line may still continue
+    assert _contains_decision("PUT\nbecause")
+    engine = BaseLLMEngine(api_key="test")
+    assert engine._parse_response("OUTPUT looks weak, PUT") == "PUT"
+    assert engine._parse_response("Model INPUT unclear") == "NO TRADE"
+
+def test_select_symbol_does_not_stop_on_a_symbol_prefix():
+    engine = BaseLLMEngine(api_key="test")
+    stream = _FakeStream(["EURUSD", "T", " looks", " strongest"])
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.return_value = stream
+
+    assert engine._select_symbol(["EURUSD", "EURUSDT"], "system", "user") == "EURUSDT"
+    assert stream.consumed == 3 and stream.closed
@@ -17,4 +17,125 @@ def test_place_signal(broker):
 def test_check_signal_result(broker):
     # Check that the signal result is always returned as True in dummy mode
     result = broker.check_trade_result('any_trade_id')
-    assert result is True
\ No newline at end of file
+    assert result is True
+
+def test_quote_reused_within_ttl_but_not_for_exit_price():
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.side_effect = [{'price': 1.10}, {'price': 1.20}]
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=60)
+
+    first = sim.place_trade('EURUSD', 10, 'CALL', 0)
+    sim.place_trade('EURUSD', 10, 'PUT', 0)
+    assert feed.get_quote.call_count == 1
+
+    # Expiry is after the cached fetch, so the exit price is fetched fresh
+    assert sim.check_trade_result(first) is True
+    assert feed.get_quote.call_count == 2
+
+def test_await_many_settles_trades_concurrently():
+    import asyncio
+    import time
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.side_effect = [{'price': 1.10}, {'price': 1.10}, {'price': 1.20}, {'price': 1.20}]
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=0)
+
+    async def run():
+        ids = [await sim.aplace_trade('EURUSD', 10, 'CALL', 0.2),
+               await sim.aplace_trade('GBPUSD', 10, 'PUT', 0.2)]
+        assert set(sim.pending) == set(ids)
+        return await sim.await_many(ids)
+
+    start = time.monotonic()
+    results = asyncio.run(run())
+    # Both expiries are waited out together rather than back to back
+    assert time.monotonic() - start < 0.4
+    assert results == [True, False]
+    assert sim.pending == {}
+
+def test_trade_outcome_by_direction_sign():
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=0)
+    cases = [('CALL', 1.2, True), ('CALL', 1.0, False), ('PUT', 1.0, True), ('PUT', 1.1, False), ('HOLD', 1.2, False)]
+    for direction, exit_price, expected in cases:
+        feed.get_quote.side_effect = [{'price': 1.1}, {'price': exit_price}]
+        assert sim.check_trade_result(sim.place_trade('EURUSD', 10, direction, 0)) is expected
+    assert sim.get_simulated_stats() == {'wins': 2, 'losses': 3, 'total': 5}
+
+def test_settle_expired_settles_only_expired_trades():
+    import time
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.side_effect = lambda asset: {'price': {'EURUSD': 1.1, 'GBPUSD': 1.3}[asset]}
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=0)
+    expired = [sim.place_trade('EURUSD', 10, 'CALL', 0), sim.place_trade('EURUSD', 10, 'PUT', 0),
+               sim.place_trade('GBPUSD', 10, 'PUT', 0)]
+    # More open trades than the initial array capacity, one in the middle settled individually
+    still_open = [sim.place_trade('EURUSD', 10, 'CALL', 3600) for _ in range(35)]
+    assert sim.check_trade_result(sim.place_trade('EURUSD', 10, 'CALL', 0)) is False
+    still_open += [sim.place_trade('EURUSD', 10, 'CALL', 3600) for _ in range(35)]
+
+    # GBPUSD has no supplied exit price, so it is quoted through the feed (unchanged: a loss)
+    results = sim.settle_expired(exit_prices={'EURUSD': 1.2})
+
+    assert results == {expired[0]: True, expired[1]: False, expired[2]: False}
+    assert sorted(sim.active_trades) == sorted(still_open)
+    assert sorted(sim._slot_ids[:sim._n_open].tolist()) == sorted(still_open)
+    assert sim.get_simulated_stats() == {'wins': 1, 'losses': 3, 'total': 4}
+    assert sim.settle_expired(exit_prices={'EURUSD': 1.2}) == {}
+    later = sim.settle_expired(now=time.time() + 3601, exit_prices={'EURUSD': 1.2})
+    assert later == {trade_id: True for trade_id in still_open}
+    assert sim.active_trades == {}
+
+def test_settle_expired_hands_result_to_pending_settlement():
+    import asyncio
+    import time
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.return_value = {'price': 1.1}
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=0)
+
+    async def run():
+        trade_id = await sim.aplace_trade('EURUSD', 10, 'CALL', 0.1)
+        # The bulk sweep settles it while its task is still waiting for expiry
+        assert sim.settle_expired(now=time.time() + 1, exit_prices={'EURUSD': 1.2}) == {trade_id: True}
+        return await sim.acheck_trade_result(trade_id)
+
+    assert asyncio.run(run()) is True
+    assert sim.get_simulated_stats() == {'wins': 1, 'losses': 0, 'total': 1}
+    assert sim.pending == {} and sim._settled == {}
+
+def test_settle_expired_result_reaches_a_later_sync_check():
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.return_value = {'price': 1.1}
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=0)
+    trade_id = sim.place_trade('EURUSD', 10, 'CALL', 0)
+    assert sim.settle_expired(exit_prices={'EURUSD': 1.2}) == {trade_id: True}
+    # No async task was waiting: the blocking check still gets the win, not a "not found" loss
+    assert sim.check_trade_result(trade_id) is True
+    assert sim._settled == {}
+
+def test_concurrent_settlements_keep_slots_consistent():
+    import threading
+    from unittest.mock import MagicMock
+    feed = MagicMock()
+    feed.get_quote.return_value = {'price': 1.1}
+    sim = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=60)
+    expired = [sim.place_trade('EURUSD', 10, 'CALL', 0) for _ in range(200)]
+    still_open = [sim.place_trade('EURUSD', 10, 'CALL', 3600) for _ in range(50)]
+
+    threads = [threading.Thread(target=lambda ids=expired[i::8]: [sim.check_trade_result(t) for t in ids])
+               for i in range(8)]
+    threads.append(threading.Thread(target=sim.settle_expired))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every expired trade is counted exactly once and the open slots map back to their ids
+    assert sim.get_simulated_stats()['total'] == len(expired)
+    assert sorted(sim.active_trades) == sorted(still_open)
+    assert {t: sim._slot_ids[i] for t, i in sim._id_to_slot.items()} == {t: t for t in still_open}
@@ -0,0 +1,96 @@
+import time
+from unittest.mock import MagicMock
+from src.cache import SharedCache, get_shared_cache
+from src.execution.broker_api import BrokerAPI
+
+class FakeRedis:
+    """In-memory stand-in for the few redis.Redis calls SharedCache makes."""
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        value, expires_at = self.store.get(key, (None, None))
+        if expires_at is not None and time.monotonic() > expires_at:
+            del self.store[key]
+            return None
+        return value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self.get(key) is not None:
+            return None
+        self.store[key] = (value.encode() if isinstance(value, str) else value,
+                           time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        # Only the lock-release compare-and-delete script is used
+        if self.get(key) == token.encode():
+            self.delete(key)
+            return 1
+        return 0
+
+def test_shared_cache_round_trip_and_single_flight_lock():
+    cache = SharedCache(FakeRedis())
+    assert cache.get("dec:abc") is None
+    cache.set("dec:abc", "CALL", ttl=60)
+    assert cache.get("dec:abc") == "CALL"
+
+    other_worker = SharedCache(cache.client)
+    assert cache.acquire("dec:abc", ttl=60)
+    assert not other_worker.acquire("dec:abc", ttl=60)
+    # Releasing someone else's lock is a no-op
+    other_worker.release("dec:abc")
+    assert not other_worker.acquire("dec:abc", ttl=60)
+    cache.release("dec:abc")
+    assert other_worker.acquire("dec:abc", ttl=60)
+
+def test_release_after_expiry_keeps_the_new_holders_lock():
+    cache = SharedCache(FakeRedis())
+    other_worker = SharedCache(cache.client)
+    assert cache.acquire("dec:abc", ttl=0.01)
+    time.sleep(0.02)
+    assert other_worker.acquire("dec:abc", ttl=60)
+    # Our lock expired and was taken over: releasing it must not drop the other worker's
+    cache.release("dec:abc")
+    assert not SharedCache(cache.client).acquire("dec:abc", ttl=60)
+
+def test_shared_cache_treats_redis_errors_as_misses():
+    client = MagicMock()
+    client.get.side_effect = ConnectionError("redis down")
+    client.set.side_effect = ConnectionError("redis down")
+    cache = SharedCache(client)
+    assert cache.get("quote:EURUSD") is None
+    cache.set("quote:EURUSD", 1.0, ttl=1)
+    assert cache.acquire("quote:EURUSD", ttl=1) is True
+
+def test_get_shared_cache_disabled_without_url(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    assert get_shared_cache() is None
+
+def test_brokers_share_quote_fetches_through_cache():
+    shared = FakeRedis()
+    feed = MagicMock()
+    feed.get_quote.return_value = {'price': 1.1}
+    first = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=60, shared_cache=SharedCache(shared))
+    second = BrokerAPI(ssid='dummy_ssid', data_feed_instance=feed, quote_cache_ttl=60, shared_cache=SharedCache(shared))
+
+    first.place_trade('EURUSD', 10, 'CALL', 60)
+    second.place_trade('EURUSD', 10, 'CALL', 60)
+    assert feed.get_quote.call_count == 1
+
+def test_engines_share_completions_through_cache():
+    from types import SimpleNamespace
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    shared = FakeRedis()
+    workers = [TemporalLLMEngine(api_key="test", shared_cache=SharedCache(shared)) for _ in range(2)]
+    chunk = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="CALL\n"))])
+    for engine in workers:
+        engine.client = MagicMock()
+        engine.client.chat.completions.create.side_effect = lambda **_: iter([chunk])
+
+    assert workers[0]._call_openai_api("system", "user") == "CALL"
+    assert workers[1]._call_openai_api("system", "user") == "CALL"
+    workers[1].client.chat.completions.create.assert_not_called()
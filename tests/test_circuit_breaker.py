@@ -0,0 +1,40 @@
+import time
+from src.decision.circuit_breaker import CircuitBreaker
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(fail_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open()
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(fail_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open()
+
+def test_breaker_half_opens_after_timeout():
+    breaker = CircuitBreaker(fail_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.is_open()
+    time.sleep(0.02)
+    # Cooldown elapsed: one trial call is allowed through
+    assert not breaker.is_open()
+    # A failed trial re-opens the breaker immediately
+    breaker.record_failure()
+    assert breaker.is_open()
+
+def test_half_open_lets_only_one_probe_through():
+    breaker = CircuitBreaker(fail_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert not breaker.is_open()
+    # Concurrent callers stay short-circuited while the trial call is in flight
+    assert breaker.is_open()
+    assert breaker.is_open()
+    breaker.record_success()
+    assert not breaker.is_open()
+    assert not breaker.is_open()
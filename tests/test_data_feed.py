@@ -28,5 +28,20 @@ class TestDataFeed(unittest.TestCase):
         self.data_feed.remove_data_source('Polygon')
         self.assertNotIn('Polygon', self.data_feed.data_sources)
 
+    def test_wait_for_price_change_returns_on_threshold(self):
+        from unittest.mock import MagicMock
+        self.data_feed.get_quote = MagicMock(side_effect=[
+            ConnectionError("transient"), {'price': 1.1001}, {'price': 1.1050}, {'price': 1.2}
+        ])
+        quote = self.data_feed.wait_for_price_change('EURUSD', 1.1, min_change_pct=0.1, timeout=5, poll_interval=0)
+        self.assertEqual(quote, {'price': 1.1050})
+        self.assertEqual(self.data_feed.get_quote.call_count, 3)
+
+    def test_wait_for_price_change_times_out(self):
+        from unittest.mock import MagicMock
+        self.data_feed.get_quote = MagicMock(return_value={'price': 1.1})
+        quote = self.data_feed.wait_for_price_change('EURUSD', 1.1, min_change_pct=0.1, timeout=0.05, poll_interval=0.01)
+        self.assertEqual(quote, {'price': 1.1})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
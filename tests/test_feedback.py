@@ -8,8 +8,8 @@ def test_feedback_loop_initialization():
 def test_record_trade_outcome():
     feedback_loop = FeedbackLoop()
     feedback_loop.record_trade_outcome('CALL', True)
-    assert feedback_loop.trade_history[-1]['decision'] == 'CALL'
-    assert feedback_loop.trade_history[-1]['outcome'] is True
+    assert feedback_loop.trade_history[-1].decision == 'CALL'
+    assert feedback_loop.trade_history[-1].outcome is True
 
 def test_calculate_win_rate():
     feedback_loop = FeedbackLoop()
@@ -29,4 +29,46 @@ def test_feedback_loop_logging():
     feedback_loop = FeedbackLoop()
     feedback_loop.record_trade_outcome('PUT', True)
     assert len(feedback_loop.trade_history) == 1
-    assert feedback_loop.trade_history[0]['decision'] == 'PUT'
\ No newline at end of file
+    assert feedback_loop.trade_history[0].decision == 'PUT'
+
+def test_trade_history_is_bounded_but_metrics_are_lifetime():
+    feedback_loop = FeedbackLoop(history_window=3)
+    for outcome in [True, True, False, False, True]:
+        feedback_loop.record_trade_outcome('CALL', outcome)
+    assert len(feedback_loop.trade_history) == 3
+    assert [t.outcome for t in feedback_loop.recent_history()] == [False, False, True]
+    assert [t.outcome for t in feedback_loop.recent_history(2)] == [False, True]
+    assert feedback_loop.get_performance_metrics()['total_trades'] == 5
+    assert feedback_loop.calculate_win_rate() == 0.6
+
+def test_history_window_must_be_positive():
+    with pytest.raises(ValueError):
+        FeedbackLoop(history_window=0)
+
+def test_signal_recorded_without_outcome():
+    feedback_loop = FeedbackLoop()
+    feedback_loop.record_signal('PUT')
+    entry = feedback_loop.trade_history[-1]
+    assert (entry.decision, entry.outcome, entry.signal) == ('PUT', None, True)
+    assert feedback_loop.get_performance_metrics()['total_trades'] == 0
+
+def test_analyze_trade_history_over_window():
+    feedback_loop = FeedbackLoop(history_window=4)
+    assert feedback_loop.analyze_trade_history()['trades'] == 0
+    # The first trade falls out of the window once the ring wraps
+    for decision, outcome in [('PUT', True), ('CALL', True), ('PUT', False), ('CALL', False), ('CALL', False)]:
+        feedback_loop.record_trade_outcome(decision, outcome)
+    stats = feedback_loop.analyze_trade_history()
+    assert stats['trades'] == 4
+    assert stats['win_rate'] == 0.25
+    assert stats['call_accuracy'] == 1 / 3
+    assert stats['put_accuracy'] == 0.0
+    assert stats['streak'] == -3
+
+def test_record_trade_is_alias_for_record_trade_outcome():
+    feedback_loop = FeedbackLoop()
+    feedback_loop.record_trade('CALL', 'win')
+    feedback_loop.record_trade('PUT', 'loss')
+    assert [(t.decision, t.outcome) for t in feedback_loop.trade_history] == [('CALL', True), ('PUT', False)]
+    assert feedback_loop.get_performance_metrics()['total_trades'] == 2
+    assert feedback_loop.analyze_trade_history()['call_accuracy'] == 1.0
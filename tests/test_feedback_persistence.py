@@ -1,7 +1,7 @@
 import os
 import sqlite3
 import pytest
-from src.feedback.feedback_loop import FeedbackLoop
+from src.feedback.feedback_loop import FeedbackLoop, _engine_options
 from src.feedback.models import Trade
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -27,6 +27,8 @@ def test_persistence_to_disk(tmp_path):
     # Initialize and record a trade
     loop = FeedbackLoop(database_url=db_url)
     loop.record_trade_outcome('CALL', True)
+    # Trades are buffered until flushed (or the batch fills up)
+    loop.flush()
     # Connect directly to the database to verify persistence
     engine = create_engine(db_url)
     Session = sessionmaker(bind=engine)
@@ -35,3 +37,97 @@ def test_persistence_to_disk(tmp_path):
     assert len(trades) == 1
     assert trades[0].decision == 'CALL'
     assert trades[0].outcome is True
+
+
+def test_trades_flushed_in_batches(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'trades.db'}"
+    loop = FeedbackLoop(database_url=db_url, flush_threshold=3)
+    Session = sessionmaker(bind=create_engine(db_url))
+
+    loop.record_trade_outcome('CALL', True)
+    loop.record_trade_outcome('PUT', False)
+    assert Session().query(Trade).count() == 0
+
+    loop.record_trade_outcome('CALL', True)
+    assert Session().query(Trade).count() == 3
+    assert loop._pending_trades == []
+
+
+def test_exit_flush_does_not_keep_loops_alive(tmp_path):
+    import gc
+    import weakref
+    from src.feedback import feedback_loop as module
+    db_url = f"sqlite:///{tmp_path / 'trades.db'}"
+    loop = FeedbackLoop(database_url=db_url)
+    assert loop in module._open_loops
+
+    loop.record_trade_outcome('CALL', True)
+    loop.close()
+    assert loop not in module._open_loops and loop.session is None
+    assert sessionmaker(bind=create_engine(db_url))().query(Trade).count() == 1
+
+    # The exit hook holds loops weakly: a dropped loop is collected
+    dropped = weakref.ref(FeedbackLoop(database_url=db_url))
+    gc.collect()
+    assert dropped() is None
+
+
+def test_engine_options_per_backend():
+    assert _engine_options("sqlite:///trades.db") == {}
+    pg = _engine_options("postgresql+psycopg://user:pw@pgbouncer:6432/trades")
+    assert pg['pool_size'] == 4 and pg['max_overflow'] == 0 and pg['pool_pre_ping']
+    assert pg['connect_args'] == {'prepare_threshold': None}
+    assert 'connect_args' not in _engine_options("postgresql+psycopg2://user:pw@db/trades")
+
+
+def test_engine_shared_per_database_url(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'trades.db'}"
+    first = FeedbackLoop(database_url=db_url)
+    second = FeedbackLoop(database_url=db_url)
+    assert first.engine is second.engine
+    assert first.session is not second.session
+
+
+def test_should_end_session_thresholds_follow_arguments():
+    loop = FeedbackLoop()
+    for _ in range(3):
+        loop.record_trade_outcome('PUT', False)
+    # pnl = -3 * 10 = -30 = -3% of 1000
+    assert not loop.should_end_session(initial_balance=1000, trade_amount=10, profit_target_pct=5, loss_limit_pct=4)
+    assert loop.should_end_session(initial_balance=1000, trade_amount=10, profit_target_pct=5, loss_limit_pct=3)
+    # Without a balance PnL percent stays 0, so only non-positive limits end the session
+    assert not loop.should_end_session(initial_balance=0, trade_amount=10, profit_target_pct=5, loss_limit_pct=3)
+    assert loop.should_end_session(initial_balance=0, trade_amount=10, profit_target_pct=0, loss_limit_pct=3)
+
+
+def test_bulk_load_writes_in_batches(tmp_path, monkeypatch):
+    import src.feedback.feedback_loop as feedback_module
+    monkeypatch.setattr(feedback_module, 'BULK_LOAD_BATCH_SIZE', 2)
+    db_url = f"sqlite:///{tmp_path / 'trades.db'}"
+    loop = FeedbackLoop(database_url=db_url)
+    loop.record_trade_outcome('CALL', True)
+
+    written = loop.bulk_load(('PUT' if i % 2 else 'CALL', i % 3 == 0) for i in range(5))
+
+    assert written == 5
+    trades = sessionmaker(bind=create_engine(db_url))().query(Trade).order_by(Trade.id).all()
+    assert len(trades) == 6
+    assert [t.decision for t in trades[:3]] == ['CALL', 'CALL', 'PUT']
+    assert all(t.timestamp is not None for t in trades)
+    assert loop.get_performance_metrics()['total_trades'] == 1
+
+
+def test_trade_indexes_added_to_existing_table(tmp_path):
+    from sqlalchemy import inspect, text
+    db_file = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(db_file)
+    legacy.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY, decision VARCHAR NOT NULL, "
+                   "outcome BOOLEAN NOT NULL, timestamp DATETIME)")
+    legacy.close()
+
+    loop = FeedbackLoop(database_url=f"sqlite:///{db_file}")
+    names = {ix['name'] for ix in inspect(loop.engine).get_indexes('trades')}
+    assert {'ix_trades_timestamp_brin', 'ix_trades_wins_ts'} <= names
+    with loop.engine.connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'ix_trades_wins_ts'")).scalar()
+    assert 'WHERE outcome = 1' in ddl
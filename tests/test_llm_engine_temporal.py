@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import MagicMock, patch
 import pandas as pd
@@ -109,4 +110,367 @@ def test_temporal_engine_select_pair():
     
     # Test with empty list
     selected = engine.select_pair([], mock_data_feed)
-    assert selected is None, f"Expected select_pair to return None with empty list, got {selected}"
\ No newline at end of file
+    assert selected is None, f"Expected select_pair to return None with empty list, got {selected}"
+
+def _stream(pieces):
+    from types import SimpleNamespace
+    return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))]) for p in pieces])
+
+
+def _make_real_engine(indicators, patterns):
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    engine.historical_collector = MagicMock()
+    engine.historical_collector.calculate_technical_indicators.side_effect = lambda s: indicators[s]
+    engine.historical_collector.get_pattern_analysis.side_effect = lambda s: patterns.get(s, {"patterns": []})
+    return engine
+
+
+def test_select_pair_returns_high_scoring_symbol_without_llm():
+    indicators = {
+        "EURUSD": {"rsi_14": 50.0, "trend_direction": "neutral"},
+        "GBPUSD": {"rsi_14": 75.0, "trend_direction": "bullish"},
+    }
+    engine = _make_real_engine(indicators, {})
+    engine.aclient = MagicMock()
+
+    assert engine.select_pair(["EURUSD", "GBPUSD"]) == "GBPUSD"
+    engine.aclient.chat.completions.create.assert_not_called()
+
+
+def test_select_pair_uses_llm_symbol_for_weak_scores():
+    from unittest.mock import AsyncMock
+    indicators = {
+        "EURUSD": {"rsi_14": 50.0, "trend_direction": "neutral"},
+        "GBPUSD": {"rsi_14": 55.0, "trend_direction": "neutral"},
+    }
+    engine = _make_real_engine(indicators, {})
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = "GBPUSD"
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = AsyncMock(return_value=response)
+
+    assert asyncio.run(engine.aselect_pair(["EURUSD", "GBPUSD"])) == "GBPUSD"
+    engine.aclient.chat.completions.create.assert_awaited_once()
+
+
+def test_select_pair_uses_sync_client_and_can_repeat():
+    indicators = {
+        "EURUSD": {"rsi_14": 50.0, "trend_direction": "neutral"},
+        "GBPUSD": {"rsi_14": 55.0, "trend_direction": "neutral"},
+    }
+    engine = _make_real_engine(indicators, {})
+    engine.aclient = MagicMock()
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.side_effect = lambda **_: _stream(["GBP", "USD"])
+
+    assert engine.select_pair(["EURUSD", "GBPUSD"]) == "GBPUSD"
+    engine._response_cache.clear()
+
+    async def from_running_loop():
+        # No nested event loop: the blocking call works even with one already running
+        return engine.select_pair(["EURUSD", "GBPUSD"])
+
+    assert asyncio.run(from_running_loop()) == "GBPUSD"
+    assert engine.client.chat.completions.create.call_count == 2
+    engine.aclient.chat.completions.create.assert_not_called()
+
+
+def test_get_decisions_batch_makes_one_call_and_maps_indices():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    dummy = DummyTemporalEngine()
+    dummy.initialize_historical_collector(MagicMock())
+    engine.historical_collector = dummy.historical_collector
+    engine.historical_collector.timeframe_minutes = 5
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.return_value = _stream(["[1]: PUT\n", "[2]: no trade\n", "[3]: CALL"])
+
+    decisions = engine.get_decisions_batch(
+        ["EURUSD", "GBPUSD", "USDJPY"], {"EURUSD": {"price": 1.2}, "GBPUSD": {"price": 1.3}}
+    )
+
+    assert decisions == {"EURUSD": "PUT", "GBPUSD": "NO TRADE", "USDJPY": "CALL"}
+    engine.client.chat.completions.create.assert_called_once()
+    user_msg = engine.client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "[2] GBPUSD" in user_msg
+
+
+def test_parse_batch_response_defaults_missing_indices():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    assert engine._parse_batch_response("[2]: CALL\n[7]: PUT", 3) == {2: "CALL"}
+
+
+@pytest.mark.parametrize("model,expects_temperature", [("gpt-4", True), ("o4-mini", False)])
+def test_completion_kwargs_are_deterministic(model, expects_temperature):
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test", model=model)
+    kwargs = engine._completion_kwargs("system", "user")
+    assert kwargs["seed"] == 42
+    assert kwargs["messages"][0]["content"] == "system"
+    assert ("temperature" in kwargs) == expects_temperature
+
+
+def test_decision_memory_keeps_last_five():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    for decision in ["CALL", "PUT", "CALL", "PUT", "CALL", "NO TRADE", "PUT"]:
+        engine._update_decision_memory("EURUSD", decision)
+    kept = [d for _, d in engine.decision_memory["EURUSD"]["decisions"]]
+    assert kept == ["CALL", "PUT", "CALL", "NO TRADE", "PUT"]
+    assert engine._get_decision_memory_context("EURUSD").count("\n") == 5
+
+
+@pytest.mark.parametrize("content,expected", [
+    ("Momentum is strong. CALL", "CALL"),
+    ("bearish divergence, put", "PUT"),
+    ("CALL looks tempting but signals conflict: NO TRADE", "NO TRADE"),
+    ("The output is unclear", "NO TRADE"),
+])
+def test_parse_response(content, expected):
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    assert engine._parse_response(content) == expected
+
+
+def test_call_openai_api_stops_streaming_at_decision_line():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    pieces = ["RSI is 72 so a PUT ", "is likely but trend is up.\n", "Decision: CALL\n", "Extra commentary", " more"]
+    stream = _stream(pieces)
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.return_value = stream
+
+    assert engine._call_openai_api("system", "user") == "CALL"
+    # The trailing commentary was never consumed
+    assert next(stream).choices[0].delta.content == "Extra commentary"
+
+
+def test_identical_prompts_hit_response_cache(monkeypatch):
+    import src.decision.llm_engine_temporal as temporal
+    engine = temporal.TemporalLLMEngine(api_key="test")
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.side_effect = lambda **_: _stream(["PUT\n"])
+
+    assert engine._call_openai_api("system", "user") == "PUT"
+    assert engine._call_openai_api("system", "user") == "PUT"
+    assert engine.client.chat.completions.create.call_count == 1
+
+    # Expired entries are refetched
+    monkeypatch.setattr(temporal, "RESPONSE_CACHE_TTL_SECONDS", -1)
+    engine._call_openai_api("system", "user")
+    assert engine.client.chat.completions.create.call_count == 2
+
+
+def test_score_symbols_matches_scoring_rules():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    analyses = [
+        {"indicators": {"rsi_14": 50.0, "trend_direction": "neutral"}, "patterns": [], "volume_signal": None},
+        {"indicators": {"rsi_14": 25.0, "trend_direction": "bearish"}, "patterns": ["doji"], "volume_signal": None},
+        {"indicators": {"rsi_14": 62.0}, "patterns": ["bullish_engulfing"], "volume_signal": "strong"},
+        {"indicators": {}, "patterns": [], "volume_signal": None},
+    ]
+    assert TemporalLLMEngine._score_symbols(analyses).tolist() == [0, 6, 6, 0]
+
+
+def test_collector_results_reused_until_new_candle():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    engine.initialize_historical_collector(data_feed=None, lookback_periods=30)
+    collector = engine.historical_collector
+    collector.calculate_technical_indicators = MagicMock(wraps=collector.calculate_technical_indicators)
+
+    engine._analyze_one_symbol("EURUSD")
+    engine._build_symbol_context("EURUSD", {"price": 1.1}, [])
+    assert collector.calculate_technical_indicators.call_count == 1
+
+    # Fresh candles for the symbol invalidate its cached results
+    collector.get_historical_data("EURUSD", force_refresh=True)
+    engine._analyze_one_symbol("EURUSD")
+    assert collector.calculate_technical_indicators.call_count == 2
+
+
+def test_select_pair_sends_top_three_candidates_in_score_order():
+    from unittest.mock import AsyncMock
+    rsi = {"AUDUSD": 50.0, "EURUSD": 62.0, "GBPUSD": 50.0, "USDJPY": 35.0, "USDCAD": 55.0}
+    indicators = {s: {"rsi_14": v} for s, v in rsi.items()}
+    patterns = {"USDCAD": {"patterns": ["doji", "hammer"]}}
+    engine = _make_real_engine(indicators, patterns)
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = AsyncMock(side_effect=Exception("offline"))
+    engine._format_pair_selection_prompt = MagicMock(return_value="prompt")
+
+    with patch("src.decision.llm_engine_temporal.asyncio.sleep", new=AsyncMock()):
+        selected = asyncio.run(engine.aselect_pair(list(rsi)))
+
+    candidates = engine._format_pair_selection_prompt.call_args.args[0]
+    assert candidates == ["USDCAD", "EURUSD", "USDJPY"]
+    assert selected == "USDCAD"
+
+
+def test_select_pair_top_three_ties_at_cutoff_keep_input_order():
+    from unittest.mock import AsyncMock
+    symbols = [f"SYM{i}" for i in range(7)]
+    engine = _make_real_engine({s: {} for s in symbols}, {})
+    engine._score_symbols = MagicMock(return_value=np.array([1, 4, 2, 3, 3, 0, 4]))
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = AsyncMock(side_effect=Exception("offline"))
+    engine._format_pair_selection_prompt = MagicMock(return_value="prompt")
+
+    with patch("src.decision.llm_engine_temporal.asyncio.sleep", new=AsyncMock()):
+        asyncio.run(engine.aselect_pair(symbols))
+
+    # Same order as sorted(..., reverse=True) on the scores: SYM3 beats the equally scored SYM4
+    assert engine._format_pair_selection_prompt.call_args.args[0] == ["SYM1", "SYM6", "SYM3"]
+
+
+def test_retry_delay_honours_retry_after_header():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine, API_TIMEOUT_SECONDS
+    error = MagicMock()
+    error.response.headers = {"retry-after": "2.5"}
+    assert TemporalLLMEngine._retry_delay(error, 1) == 2.5
+    error.response.headers = {}
+    assert TemporalLLMEngine._retry_delay(error, 4) == 4
+    # An outsized Retry-After is capped at the per-request timeout
+    error.response.headers = {"retry-after": "3600"}
+    assert TemporalLLMEngine._retry_delay(error, 1) == API_TIMEOUT_SECONDS
+
+
+def test_slow_async_call_is_hedged_after_p95():
+    import asyncio
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    engine._async_latencies.extend([0.01] * 20)
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        # The first request hangs; the hedged duplicate answers immediately
+        await asyncio.sleep(5 if len(calls) == 1 else 0)
+        return f"response {len(calls)}"
+
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = create
+
+    assert asyncio.run(engine._ahedged_create({"model": "gpt-4"})) == "response 2"
+    assert len(calls) == 2
+    # The hedge's own latency is recorded, not the time since the first request was sent
+    assert engine._async_latencies[-1] < 0.01
+
+
+def test_cancelled_hedged_call_cancels_outstanding_requests():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    cancelled = []
+
+    async def create(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(kwargs)
+            raise
+
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = create
+
+    async def run():
+        call = asyncio.ensure_future(engine._ahedged_create({"model": "gpt-4"}))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(run())
+    assert len(cancelled) == 1
+
+
+def test_non_streamed_calls_get_the_full_output_timeout():
+    from types import SimpleNamespace
+    from src.decision.llm_engine_temporal import TemporalLLMEngine, API_TIMEOUT_SECONDS, NON_STREAMED_TIMEOUT_SECONDS
+    engine = TemporalLLMEngine(api_key="test")
+    seen = {}
+
+    async def create(**kwargs):
+        seen.update(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="CALL"))])
+
+    engine.aclient = MagicMock()
+    engine.aclient.chat.completions.create = create
+
+    assert asyncio.run(engine._arequest_completion("system", "user")) == "CALL"
+    assert seen["timeout"] == NON_STREAMED_TIMEOUT_SECONDS > API_TIMEOUT_SECONDS
+    assert engine._completion_kwargs("system", "user")["timeout"] == API_TIMEOUT_SECONDS
+
+
+def test_async_http_client_pool_limits_reach_the_transport():
+    import asyncio
+    pytest.importorskip("httpx")
+    from src.decision import llm_engine_temporal as module
+
+    client = module._build_async_http_client()
+    pool = client._transport._pool
+    assert pool._max_connections == module.ASYNC_HTTP_MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == module.ASYNC_HTTP_MAX_KEEPALIVE
+    assert pool._http2 is module.HTTP2_AVAILABLE
+    asyncio.run(client.aclose())
+
+
+def test_orjson_request_encoder_matches_sdk_bytes(monkeypatch):
+    pytest.importorskip("orjson")
+    from openai import _base_client
+    from src.decision import llm_engine_temporal as module
+    if not hasattr(_base_client, "openapi_dumps"):
+        pytest.skip("OpenAI SDK has no openapi_dumps hook")
+    from openai._utils._json import openapi_dumps as sdk_dumps
+
+    # Building an engine leaves the SDK encoder alone: orjson encoding is opt-in
+    before = _base_client.openapi_dumps
+    module.TemporalLLMEngine(api_key="test")
+    assert _base_client.openapi_dumps is before
+
+    monkeypatch.setattr(_base_client, "openapi_dumps", module._orjson_request_encoder(sdk_dumps))
+    body = {"model": "gpt-4", "messages": [{"role": "user", "content": "EUR/USD ≈ 1.08\nCALL?"}], "seed": 42}
+    assert _base_client.openapi_dumps(body) == sdk_dumps(body)
+
+
+def test_legacy_interface_streams_dict_chunks(monkeypatch):
+    import src.decision.llm_engine_temporal as temporal
+    monkeypatch.setattr(temporal, "OPENAI_V1", False)
+    engine = temporal.TemporalLLMEngine(api_key="test")
+    chunks = [{"choices": [{"delta": {"content": "Trend is down.\n"}}]}, {"choices": [{"delta": {"content": "PUT\n"}}]}]
+    create = MagicMock(return_value=iter(chunks))
+    monkeypatch.setattr(temporal.openai, "ChatCompletion", MagicMock(create=create), raising=False)
+
+    assert engine._call_openai_api("system", "user") == "PUT"
+    assert "max_tokens" in create.call_args.kwargs and "request_timeout" in create.call_args.kwargs
+
+
+def test_select_pair_tied_winners_keep_input_order():
+    indicators = {s: {"rsi_14": 80.0, "trend_direction": "bullish"} for s in ["USDJPY", "EURUSD"]}
+    engine = _make_real_engine(indicators, {})
+    engine.aclient = MagicMock()
+    assert engine.select_pair(["USDJPY", "EURUSD"]) == "USDJPY"
+    engine.aclient.chat.completions.create.assert_not_called()
+
+def test_serialize_trades_matches_with_and_without_orjson(monkeypatch):
+    from src.decision import llm_engine_temporal as module
+    from src.feedback.feedback_loop import TradeEntry
+    trades = [TradeEntry('CALL', True), TradeEntry('PUT', None, signal=True)]
+    expected = '[{"decision":"CALL","outcome":true,"signal":false},{"decision":"PUT","outcome":null,"signal":true}]'
+
+    assert module._serialize_trades(trades) == expected
+    monkeypatch.setattr(module, 'ORJSON_AVAILABLE', False)
+    assert module._serialize_trades(trades) == expected
+    assert module._serialize_trades([]) == ""
+
+
+def test_sync_streamed_calls_do_not_feed_hedge_latencies():
+    from src.decision.llm_engine_temporal import TemporalLLMEngine
+    engine = TemporalLLMEngine(api_key="test")
+    engine.client = MagicMock()
+    engine.client.chat.completions.create.side_effect = lambda **_: _stream(["CALL\n"])
+    for i in range(3):
+        engine._call_openai_api("system", f"user {i}")
+    assert len(engine._async_latencies) == 0
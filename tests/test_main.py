@@ -1,50 +1,29 @@
 import pytest
-from unittest.mock import MagicMock, patch
+import src.main
+
+# Patches src.main: keep on the worker that holds the session-scoped main mocks;
+# run_session is replaced once for the whole module
+pytestmark = [pytest.mark.xdist_group("main_patches"), pytest.mark.usefixtures("patch_run_session")]
 
 @pytest.fixture
-def mock_components():
+def mock_components(main_mocks):
     """Create mock components for testing main.py"""
-    with patch('src.main.DataFeed') as mock_data_feed, \
-         patch('src.main.OTCFeed') as mock_otc_feed, \
-         patch('src.main.LLMEngine') as mock_llm_engine_class, \
-         patch('src.main.BrokerAPI') as mock_broker, \
-         patch('src.main.FeedbackLoop') as mock_feedback, \
-         patch('src.main.Config') as mock_config, \
-         patch('src.main.run_session') as mock_run_session:
-        
-        # Configure mock_config
-        mock_config.return_value.openai_api_key = "test_key"
-        mock_config.return_value.po_ssid = "test_ssid"
-        mock_config.return_value.polygon_api_key = "test_polygon"
-        mock_config.return_value.log_level = "INFO"
-        
-        # Configure mock_otc_feed
-        mock_otc_feed.return_value.get_otc_symbols.return_value = ["EURUSD", "GBPUSD", "USDJPY"]
-        
-        # Configure mocked engine instance
-        mock_engine_instance = MagicMock()
-        mock_engine_instance.select_pair.return_value = "EURUSD"
-        mock_llm_engine_class.return_value = mock_engine_instance
-        
-        yield {
-            'data_feed': mock_data_feed,
-            'otc_feed': mock_otc_feed,
-            'engine_class': mock_llm_engine_class,
-            'engine_instance': mock_engine_instance,
-            'broker': mock_broker,
-            'feedback': mock_feedback,
-            'config': mock_config,
-            'run_session': mock_run_session
-        }
+    return {
+        'data_feed': main_mocks['DataFeed'],
+        'otc_feed': main_mocks['OTCFeed'],
+        'engine_class': main_mocks['LLMEngine'],
+        'engine_instance': main_mocks['engine_instance'],
+        'broker': main_mocks['BrokerAPI'],
+        'feedback': main_mocks['FeedbackLoop'],
+        'config': main_mocks['Config'],
+        'run_session': main_mocks['run_session']
+    }
 
 def test_main_passes_data_feed_to_select_pair(mock_components):
     """Test that main passes the data_feed to the select_pair method"""
     
-    # Import main after patches are active
-    from src.main import main
-    
-    # Call the main function
-    main()
+    # Call the main function (main_mocks has swapped its dependencies on the module)
+    src.main.main()
     
     # Check if select_pair was called with the right arguments
     mock_engine_instance = mock_components['engine_instance']
@@ -64,3 +43,11 @@ def test_main_passes_data_feed_to_select_pair(mock_components):
     mock_run_session_call = mock_components['run_session']
     run_session_kwargs = mock_run_session_call.call_args[1]
     assert run_session_kwargs['symbol'] == 'EURUSD'
+
+def test_main_enables_orjson_encoder_when_configured(mock_components, monkeypatch):
+    from unittest.mock import MagicMock
+    enable = MagicMock(return_value=True)
+    monkeypatch.setattr(src.main, 'use_orjson_request_encoder', enable)
+    monkeypatch.setattr(mock_components['config'].return_value, 'orjson_requests', True)
+    src.main.main()
+    enable.assert_called_once_with()
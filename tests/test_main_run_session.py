@@ -1,96 +1,92 @@
 import pytest
+from types import SimpleNamespace
 from src.main import run_session
 
-class DummyFeed:
-    def get_quote(self, symbol):
-        return {'price': 100.0}
-
-class DummyOTC:
-    def get_otc_candles(self, symbol, interval):
-        return {'candle': 'dummy'}
-
-class DummyEngine:
-    def __init__(self, decisions):
-        self.decisions = decisions
-        self.index = 0
-    def get_decision(self, market_data, recent_trades):
-        # Return next decision or NO TRADE when exhausted
-        if self.index < len(self.decisions):
-            d = self.decisions[self.index]
-            self.index += 1
-            return d
-        return 'NO TRADE'
-
-class DummyBroker:
-    def __init__(self, outcomes):
-        self.outcomes = outcomes
-        self.index = 0
-    def place_trade(self, asset, amount, direction, duration):
-        return f"trade{self.index}"
-    def check_trade_result(self, trade_id):
-        # Return next outcome
-        if self.index < len(self.outcomes):
-            result = self.outcomes[self.index]
-            self.index += 1
-            return result
-        return False
-    def subscribe_candles(self, asset, timeframe):
-        pass
-    def disconnect(self):
-        pass
-
-def make_cfg():
-    # Build a simple config object with needed attributes
-    class C:
-        pass
-    cfg = C()
-    cfg.otc_interval = 1
-    cfg.trade_amount = 10
-    cfg.initial_balance = 100
-    cfg.profit_target_pct = 5
-    cfg.loss_limit_pct = 2
-    cfg.enable_demo_mode = True  # Add this for signal-only mode
-    # Add other config parameters needed for run_session
-    cfg.max_consecutive_no_trade = 5
-    cfg.pair_blacklist_duration_seconds = 300
-    cfg.max_consecutive_system_switches = 3
-    cfg.system_cool_down_duration_seconds = 60
-    return cfg
-
-@pytest.mark.parametrize("decisions,outcomes,expected_trades", [
+# (decisions, outcomes, expected_trades) for test_run_session_stops_on_risk
+_CASES = (
     # Single win (PnL +10 = +10% of initial_balance 100) meets profit target (5%). Stops.
-    (["CALL"], [True], 1),
+    (("CALL",), (True,), 1),
     # First loss (PnL -10 = -10% of initial_balance 100) meets loss limit (2%, i.e. PnL <= -2). Stops.
-    (["PUT", "PUT"], [False, False], 1), # Was 2
+    (("PUT", "PUT"), (False, False), 1), # Was 2
     # First win (PnL +10 = +10% of initial_balance 100) meets profit target (5%). Stops.
-    (["CALL", "PUT", "CALL"], [True, False, True], 1), # Was 3
-])
-def test_run_session_stops_on_risk(decisions, outcomes, expected_trades):
-    cfg = make_cfg()
-    data_feed = DummyFeed()
-    otc_feed = DummyOTC()
-    engine = DummyEngine(decisions)
-    broker = DummyBroker(outcomes)
-    feedback = pytest.importorskip('src.feedback.feedback_loop').FeedbackLoop()
+    (("CALL", "PUT", "CALL"), (True, False, True), 1), # Was 3
+)
+
+@pytest.mark.parametrize("decisions,outcomes,expected_trades", _CASES, ids=["win", "loss", "win_first"])
+def test_run_session_stops_on_risk(decisions, outcomes, expected_trades, cfg, dummy_feed, dummy_otc,
+                                   make_engine, make_broker, feedback_loop):
+    engine = make_engine(decisions)
+    broker = make_broker(outcomes)
     # Add symbols_list and initial_symbol_idx arguments for compatibility with new run_session signature
     symbols_list = ["TEST_SYMBOL"]
     initial_symbol_idx = 0
-    trades = run_session(cfg, data_feed, otc_feed, engine, broker, feedback, symbols_list, initial_symbol_idx, max_iterations=3)  # Set a small max_iterations value
+    trades = run_session(cfg, dummy_feed, dummy_otc, engine, broker, feedback_loop, symbols_list, initial_symbol_idx, max_iterations=3)  # Set a small max_iterations value
     assert len(trades) == expected_trades
 
-def test_run_session_max_iterations():
-    cfg = make_cfg()
-    data_feed = DummyFeed()
-    otc_feed = DummyOTC()
+# No decision trades, so the FeedbackLoop is only consulted, never fed
+@pytest.mark.parametrize("feedback_loop", ["mock"], indirect=True)
+def test_run_session_max_iterations(cfg, dummy_feed, dummy_otc, make_engine, make_broker, feedback_loop):
     # Decisions no trades
-    engine = DummyEngine(['NO TRADE', 'NO TRADE', 'NO TRADE'])
-    broker = DummyBroker([])
-    feedback = pytest.importorskip('src.feedback.feedback_loop').FeedbackLoop()
+    engine = make_engine(['NO TRADE', 'NO TRADE', 'NO TRADE'])
+    broker = make_broker([])
     # Add symbols_list and initial_symbol_idx arguments for compatibility with new run_session signature
     symbols_list = ["TEST_SYMBOL"]
     initial_symbol_idx = 0
-    trades = run_session(cfg, data_feed, otc_feed, engine, broker, feedback, symbols_list, initial_symbol_idx, max_iterations=3)
+    trades = run_session(cfg, dummy_feed, dummy_otc, engine, broker, feedback_loop, symbols_list, initial_symbol_idx, max_iterations=3)
     # No trades executed
     assert trades == []
-    # After 3 iterations it stops
-    assert engine.index == 3
+    # After 3 iterations it stops, having used every decision
+    assert engine.remaining() == []
+
+def test_run_session_reuses_decision_for_unchanged_inputs(cfg, dummy_feed, dummy_otc, make_engine, make_broker,
+                                                          feedback_loop):
+    caching_cfg = SimpleNamespace(**vars(cfg), decision_cache_ttl_seconds=60)
+    engine = make_engine(['NO TRADE', 'NO TRADE', 'NO TRADE'])
+    run_session(caching_cfg, dummy_feed, dummy_otc, engine, make_broker([]), feedback_loop, ["TEST_SYMBOL"], 0, max_iterations=3)
+    # Same price and no new trades: only the first iteration asks the LLM
+    assert engine.remaining() == ['NO TRADE', 'NO TRADE']
+
+@pytest.mark.parametrize("feedback_loop", ["mock"], indirect=True)
+def test_cached_no_trade_does_not_count_towards_pair_switch(cfg, dummy_feed, dummy_otc, make_engine, make_broker,
+                                                            feedback_loop):
+    caching_cfg = SimpleNamespace(**{**vars(cfg), "max_consecutive_no_trade": 2}, decision_cache_ttl_seconds=60)
+    engine = make_engine(['NO TRADE', 'NO TRADE', 'NO TRADE'])
+    run_session(caching_cfg, dummy_feed, dummy_otc, engine, make_broker([]), feedback_loop, ["TEST_SYMBOL"], 0, max_iterations=3)
+    # One fresh NO TRADE plus two cached repeats stays below the switch threshold
+    feedback_loop.record_system_event.assert_not_called()
+
+def test_default_decision_cache_ttl_outlives_an_idle_wait():
+    from src.config import Config
+    assert Config.decision_cache_ttl_seconds == 0 or Config.decision_cache_ttl_seconds > Config.max_idle_seconds
+
+def test_run_session_fetches_quote_and_otc_concurrently(cfg, make_engine, make_broker, feedback_loop):
+    import threading
+    # Each feed blocks until the other has been called: a sequential fetch would break the barrier
+    barrier = threading.Barrier(2, timeout=2)
+
+    class BarrierFeed:
+        def get_quote(self, symbol):
+            barrier.wait()
+            return {'price': 100.0}
+
+    class BarrierOTC:
+        def get_otc_candles(self, symbol, interval):
+            barrier.wait()
+            return {'candle': 'dummy'}
+
+    engine = make_engine(['NO TRADE'])
+    run_session(cfg, BarrierFeed(), BarrierOTC(), engine, make_broker([]), feedback_loop, ["TEST_SYMBOL"], 0, max_iterations=1)
+    assert engine.remaining() == []
+
+def test_run_session_releases_io_pool_when_loop_raises(cfg, dummy_feed, dummy_otc, make_broker, feedback_loop,
+                                                        monkeypatch):
+    from unittest.mock import MagicMock
+    import src.main
+    pool = MagicMock()
+    pool.submit.return_value.result.return_value = {'price': 100.0}
+    monkeypatch.setattr(src.main, "ThreadPoolExecutor", MagicMock(return_value=pool))
+    engine = MagicMock()
+    engine.get_decision.side_effect = RuntimeError("engine down")
+    with pytest.raises(RuntimeError):
+        run_session(cfg, dummy_feed, dummy_otc, engine, make_broker([]), feedback_loop, ["TEST_SYMBOL"], 0, max_iterations=1)
+    pool.shutdown.assert_called_once()
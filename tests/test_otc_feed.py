@@ -6,29 +6,17 @@ from src.data.otc_feed import OTCFeed
 def otc_feed():
     return OTCFeed()
 
-def test_get_otc_feed(otc_feed):
-    data = otc_feed.get_otc_feed()
+@pytest.mark.parametrize("method,args,check", [
     # Should return empty dict in signal-only mode
-    assert isinstance(data, dict)
-    assert len(data) == 0
-
-def test_get_otc_candles(otc_feed):
-    res = otc_feed.get_otc_candles('EURUSD', 60)
-    # Should return empty dict in signal-only mode
-    assert isinstance(res, dict)
-    assert len(res) == 0
-
-def test_get_otc_symbols(otc_feed):
-    syms = otc_feed.get_otc_symbols()
+    ("get_otc_feed", (), lambda r: isinstance(r, dict) and len(r) == 0),
+    ("get_otc_candles", ("EURUSD", 60), lambda r: isinstance(r, dict) and len(r) == 0),
     # Check if it returns the static list of symbols
-    assert 'EURUSD' in syms
-    assert 'GBPUSD' in syms
-    assert 'USDJPY' in syms
-
-def test_get_otc_symbol_info(otc_feed):
-    info = otc_feed.get_otc_symbol_info('EURUSD')
+    ("get_otc_symbols", (), lambda r: {"EURUSD", "GBPUSD", "USDJPY"} <= set(r)),
     # Check that it returns the expected dummy format
-    assert info['symbol'] == 'EURUSD'
+    ("get_otc_symbol_info", ("EURUSD",), lambda r: r["symbol"] == "EURUSD"),
+], ids=["feed", "candles", "symbols", "symbol_info"])
+def test_otc_methods(otc_feed, method, args, check):
+    assert check(getattr(otc_feed, method)(*args))
 
 def test_environment_setup():
     # Test environment setup (a replacement for the previous missing_ssid_env test)
@@ -1,7 +1,11 @@
+import re
 import pytest
 from src.decision.prompt_config import PromptConfig
 
-@ pytest.fixture
+_KW_RE = re.compile(r"CALL|PUT|NO TRADE")
+
+# Read-only in these tests, so one instance serves the whole module
+@pytest.fixture(scope="module")
 def cfg():
     return PromptConfig()
 
@@ -15,13 +19,23 @@ def test_user_prompt_format(cfg):
     assert patterns in user_prompt
 
 def test_system_prompt_contains_keywords(cfg):
-    sys_prompt = cfg.get_system_prompt()
-    # Should mention CALL, PUT, NO TRADE
-    assert "CALL" in sys_prompt
-    assert "PUT" in sys_prompt
-    assert "NO TRADE" in sys_prompt
+    # Should mention CALL, PUT, NO TRADE (one scan of the prompt)
+    matches = set(_KW_RE.findall(cfg.get_system_prompt()))
+    assert {"CALL", "PUT", "NO TRADE"} <= matches
 
 def test_confidence_threshold(cfg):
     thr = cfg.confidence_threshold
     assert cfg.is_trade_recommended(thr)
-    assert not cfg.is_trade_recommended(thr - 0.1)
\ No newline at end of file
+    assert not cfg.is_trade_recommended(thr - 0.1)
+def test_temporal_user_prompt_matches_str_format():
+    from src.decision.temporal_prompt_config import TemporalPromptConfig
+    tcfg = TemporalPromptConfig()
+    fields = dict(symbol="EURUSD", price_chart="chart", historical_summary="summary",
+                  current_price=1.1, recent_trades=[{"decision": "CALL"}], patterns="doji",
+                  decision_context="")
+    expected = tcfg.user_prompt_template.format(**dict(fields, decision_context="No previous decisions"))
+    assert tcfg.get_user_prompt(**fields) == expected
+
+    # Replacing the template is picked up, including ones that need str.format semantics
+    tcfg.user_prompt_template = "{symbol} at {current_price:.2f}"
+    assert tcfg.get_user_prompt(**fields) == "EURUSD at 1.10"